@@ -1,6 +1,24 @@
 #define distortionPin 2
 #define LEDPin 3
 
+// 1 = send samples in packets with a sync word, sequence number and checksum
+// (run GUI.py with --framed), 0 = send one raw byte per sample
+#define FRAMED 0
+// 1 = send full 10-bit samples packed 4 to every 5 bytes (needs FRAMED,
+// run GUI.py with --packed), 0 = send the top 8 bits of each sample
+#define PACKED 0
+#define PAYLOAD_SIZE 64  // samples per packet, a multiple of 4 when PACKED
+#if PACKED
+#if !FRAMED
+#error "PACKED needs FRAMED so the host can find the start of each group"
+#endif
+#define PAYLOAD_BYTES (PAYLOAD_SIZE / 4 * 5)
+#else
+#define PAYLOAD_BYTES PAYLOAD_SIZE
+#endif
+#define SYNC0 0xA5
+#define SYNC1 0x5A
+
 const byte adcPin = 0;  // A0
 const int MAX_RESULTS = 1;
 volatile int results [MAX_RESULTS];
@@ -8,6 +26,15 @@ volatile int resultNumber;
 int incomingByte = 0;
 bool state = false;
 
+#if FRAMED
+// Double buffer filled by the ADC ISR while loop() sends the other half
+volatile byte buffers[2][PAYLOAD_BYTES];
+volatile byte fillBuffer = 0;
+volatile byte fillIndex = 0;
+volatile int8_t readyBuffer = -1;  // buffer waiting to be sent, -1 if none
+unsigned int sequence = 0;
+#endif
+
 void setup ()
   {
   pinMode(distortionPin, OUTPUT);
@@ -27,7 +54,11 @@ void setup ()
   ADCSRA =  bit (ADEN) | bit (ADIE) | bit (ADIF);   // turn ADC on, want interrupt on completion
   ADCSRA |= bit (ADPS2);  // Prescaler of 16
 //  ADCSRA |= (1 << ADPS1) | (1 << ADPS0);    // 8 prescaler for 153.8 KHz
+#if PACKED
+  ADMUX = 0x40; // right adjust, adc0, internal vcc
+#else
   ADMUX = 0x60; // left adjust, adc0, internal vcc
+#endif
   ADCSRB = bit (ADTS0) | bit (ADTS2);  // Timer/Counter1 Compare Match B
   ADCSRA |= bit (ADATE);   // turn on automatic triggering
 
@@ -36,13 +67,54 @@ void setup ()
 // ADC complete ISR
 ISR (ADC_vect)
 {
+#if FRAMED
+#if PACKED
+    // Top 8 bits of samples 0-3 in bytes 0-3 of the group, low 2 bits in byte 4
+    unsigned int sample = ADC;
+    volatile byte *group = &buffers[fillBuffer][(fillIndex >> 2) * 5];
+    byte k = fillIndex & 3;
+    group[k] = sample >> 2;
+    if (k == 0)
+    {
+      group[4] = 0;
+    }
+    group[4] |= (sample & 3) << (2 * k);
+    fillIndex++;
+#else
+    buffers[fillBuffer][fillIndex++] = ADCH; // Read left adjusted top 8 bits
+#endif
+    if (fillIndex == PAYLOAD_SIZE)
+    {
+      readyBuffer = fillBuffer;
+      fillBuffer ^= 1;
+      fillIndex = 0;
+    }
+#else
     results[resultNumber++] = ADCH; // Read left adjusted top 8 bits
     if(resultNumber == MAX_RESULTS)
     {
       ADCSRA = 0;  // turn off ADC
     }
+#endif
 } 
 
+#if FRAMED
+// Send one packet: sync word, sequence (LE), flags, payload, checksum
+void sendPacket(byte b)
+{
+  byte header[5] = {SYNC0, SYNC1, lowByte(sequence), highByte(sequence), state ? 0x01 : 0x00};
+  byte sum = header[2] + header[3] + header[4];
+  for (int i = 0; i < PAYLOAD_BYTES; i++)
+  {
+    sum += buffers[b][i];
+  }
+  Serial.write(header, 5);
+  Serial.write((const byte *) buffers[b], PAYLOAD_BYTES);
+  Serial.write((byte) -sum);  // byte sum from sequence to checksum is zero
+  sequence++;
+}
+#endif
+
 EMPTY_INTERRUPT (TIMER1_COMPB_vect);
 
 void loop () {
@@ -58,6 +130,14 @@ void loop () {
     }
 //    digitalWrite(LEDPin, state);
   }
+#if FRAMED
+  if (readyBuffer >= 0)
+  {
+    byte b = readyBuffer;
+    readyBuffer = -1;
+    sendPacket(b);
+  }
+#else
   while (resultNumber < MAX_RESULTS)
     { }
 
@@ -70,4 +150,5 @@ void loop () {
   resultNumber = 0; 
   ADCSRA =  bit (ADEN) | bit (ADIE) | bit (ADIF)| bit (ADPS2) | bit (ADATE);   
    // turn ADC back on
+#endif
 }
\ No newline at end of file
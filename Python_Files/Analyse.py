@@ -0,0 +1,168 @@
+"""
+Offline batch analysis of recorded captures
+
+Runs the same detection as the live tuner (Hann window, band-limited PSD,
+fundamental peak picking and closest note lookup) over captures and WAV
+files, spreading files and time segments across a process pool, and writes
+a per-frame pitch track:
+
+    python Analyse.py recordings/ --tuning "Drop D" --output track.csv
+
+"""
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from Capture import CaptureReader
+from SpectrumAnalyzer import SpectrumAnalyzer, ESTIMATORS
+from Tunings import tunings, tuning_labels, chromatic_notes, note_index
+from VirtualSerial import open_source
+
+
+SAMPLING_RATE = 20000
+CHUNK_SIZE = 8192
+HOP_SIZE = CHUNK_SIZE//4
+THRESHOLD = -21 # dB
+F_MIN = 30 # Hz
+F_MAX = 1000 # Hz
+BATCH_FRAMES = 16 # frames transformed together
+
+
+def find_inputs(paths):
+    """
+    Expand files and directories into the captures and WAV files to analyse
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                found.extend(os.path.join(folder, name) for name in sorted(names)
+                             if name.lower().endswith((".wav", ".raw")))
+        else:
+            found.append(path)
+    return found
+
+
+def open_samples(path, sampling_rate):
+    """
+    Samples of a capture, raw file or WAV file, with their rate and full scale
+    """
+    base, ext = os.path.splitext(path)
+    if ext.lower() in (".raw", ".json") and os.path.exists(base + ".json"):
+        capture = CaptureReader(base)
+        full_scale = 512 if capture.dtype.itemsize > 1 else 128
+        return capture.samples, capture.sampling_rate, full_scale
+    return open_source(path, sampling_rate, loop=False), sampling_rate, 128
+
+
+def read_segment(samples, start, stop):
+    """
+    Samples *start* to *stop* of a memory map or replay source
+    """
+    if isinstance(samples, np.ndarray):
+        return np.asarray(samples[start:stop])
+    samples.seek(start)
+    return samples.read(stop - start)
+
+
+def analyse_segment(task):
+    """
+    Pitch track of the frames starting in one segment of one file
+    """
+    path, start, stop, args = task
+    samples, sampling_rate, full_scale = open_samples(path, args.sampling_rate)
+    analyzer = SpectrumAnalyzer(sampling_rate, F_MIN, F_MAX, full_scale, workers=1, estimator=args.estimator)
+    frequencies = analyzer.frequencies(args.chunk_size)
+    if args.tuning == "Chromatic":
+        index = note_index(chromatic_notes(args.a4))
+    else:
+        index = note_index(tunings[tuning_labels.index(args.tuning)])
+
+    # Include the tail needed by the last frame starting in the segment
+    data = read_segment(samples, start, stop + args.chunk_size - args.hop_size)
+    frames = sliding_window_view(data, args.chunk_size)[::args.hop_size]
+
+    peaks = []
+    for i in range(0, len(frames), BATCH_FRAMES):
+        for psd in analyzer.psd(frames[i:i + BATCH_FRAMES]):
+            peaks.append(analyzer.find_peak(psd, frequencies, args.threshold))
+    peak_freq, peak_db = np.array(peaks, dtype=np.float64).reshape(-1, 2).T
+
+    # Every frame's note in one lookup, blanked where nothing was played
+    notes, _, error, error_c = index.lookup(peak_freq)
+    played = (peak_db > args.threshold) & (peak_freq > F_MIN)
+    track = {
+        "time": (start + np.arange(len(frames))*args.hop_size + args.chunk_size) / sampling_rate,
+        "peak_freq": peak_freq,
+        "peak_db": peak_db,
+        "note": np.where(played, notes, ""),
+        "error_hz": np.where(played, np.round(error, 1), np.nan),
+        "error_cents": np.where(played, np.round(error_c, 1), np.nan),
+    }
+    return path, {column: values.tolist() for column, values in track.items()}
+
+
+def make_tasks(paths, args):
+    """
+    Split every file into segments of whole hops
+    """
+    segment = max(1, int(args.segment * args.sampling_rate) // args.hop_size) * args.hop_size
+    tasks = []
+    for path in paths:
+        samples, _, _ = open_samples(path, args.sampling_rate)
+        n_frames = (len(samples) - args.chunk_size) // args.hop_size + 1
+        end = n_frames * args.hop_size
+        tasks.extend((path, start, min(start + segment, end), args) for start in range(0, end, segment))
+    return tasks
+
+
+def write_track(results, output):
+    """
+    Write the per-frame pitch track as CSV or, for a .npz output, NumPy arrays
+    """
+    columns = ["time", "peak_freq", "peak_db", "note", "error_hz", "error_cents"]
+    if output.lower().endswith(".npz"):
+        arrays = {"path": np.concatenate([[path]*len(track["time"]) for path, track in results] or [[]])}
+        for column in columns:
+            arrays[column] = np.concatenate([np.asarray(track[column]) for _, track in results] or [[]])
+        np.savez_compressed(output, **arrays)
+        return
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["path"] + columns)
+        for path, track in results:
+            for row in zip(*(track[column] for column in columns)):
+                writer.writerow([path, "{:.4f}".format(row[0]), "{:.2f}".format(row[1]),
+                                 "{:.2f}".format(row[2])] + list(row[3:]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-run pitch detection over recorded captures")
+    parser.add_argument("paths", nargs="+", help="captures, WAV files or directories of them")
+    parser.add_argument("--output", default="pitch_track.csv", help="CSV file, or .npz for NumPy arrays")
+    parser.add_argument("--tuning", default="Standard", choices=tuning_labels)
+    parser.add_argument("--a4", type=float, default=440.0, help="reference pitch of A4 in Hz for the chromatic tuning")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="FFT length in samples")
+    parser.add_argument("--hop-size", type=int, default=HOP_SIZE, help="samples between frames")
+    parser.add_argument("--estimator", default="gaussian", choices=ESTIMATORS, help="sub-bin peak frequency estimator")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="peak threshold in dB")
+    parser.add_argument("--sampling-rate", type=int, default=SAMPLING_RATE, help="rate of raw files without a .json")
+    parser.add_argument("--segment", type=float, default=60, help="seconds of audio per task")
+    parser.add_argument("--workers", type=int, default=None, help="processes, defaults to one per core")
+    args = parser.parse_args()
+
+    tasks = make_tasks(find_inputs(args.paths), args)
+    with ProcessPoolExecutor(args.workers) as pool:
+        segments = list(pool.map(analyse_segment, tasks))
+
+    # Join the segments of each file back together in order
+    results = []
+    for path, track in segments:
+        if results and results[-1][0] == path:
+            for column, values in track.items():
+                results[-1][1][column].extend(values)
+        else:
+            results.append((path, track))
+    write_track(results, args.output)
@@ -0,0 +1,237 @@
+"""
+Tuner pipeline micro-benchmarks
+
+Times each stage of the live pipeline in isolation, and end to end, on
+synthetic 8-bit data for a sweep of window and read sizes. Results are
+written as JSON so runs from different commits can be compared:
+
+    python Benchmark.py --output before.json
+    python Benchmark.py --output after.json --compare before.json
+
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tkinter as tk
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from scipy.fft import fft, rfft
+from BlitManager import BlitManager
+from RasterCanvas import RasterCanvas
+from SampleRing import SampleRing
+from SpectrumAnalyzer import SpectrumAnalyzer
+from StreamingSpectrum import StreamingSpectrum
+from Tunings import standard_tuning, closest_note
+from VirtualSerial import PluckSource
+
+
+SAMPLING_RATE = 20000
+THRESHOLD = -15 # dB
+CHUNK_SIZES = [4096, 8192, 16384, 32768, 65536]
+READ_SIZES = [64, 546, 2048]
+# Stages whose cost depends on the read size, the rest are run once per chunk size
+READ_STAGES = ["ring_append", "end_to_end"]
+
+
+def measure(func, min_time=0.2, min_runs=20, max_runs=10000):
+    """
+    Call *func* repeatedly and summarise the per-call latency
+    """
+    func() # warm up caches and plans
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - t0)
+    samples = np.array(samples) / 1e3 # us
+    return {
+        "runs": len(samples),
+        "ops_per_sec": 1e6 / samples.mean(),
+        "mean_us": samples.mean(),
+        "p50_us": np.percentile(samples, 50),
+        "p99_us": np.percentile(samples, 99),
+    }
+
+
+def make_figure(chunk_size, analyzer):
+    """
+    Offscreen copy of the GUI's two plots, returning the canvas and lines
+    """
+    fig = Figure(figsize=(16, 9), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot(2, 1, 1)
+    line1, = ax1.plot(np.arange(chunk_size)/SAMPLING_RATE, np.zeros(chunk_size))
+    ax1.set_xlim(0, 0.125*chunk_size/SAMPLING_RATE)
+    ax1.set_ylim(-1, 1)
+    ax2 = fig.add_subplot(2, 1, 2)
+    frequencies = analyzer.frequencies(chunk_size)
+    line2, = ax2.plot(frequencies, np.zeros(len(frequencies)))
+    ax2.set_xscale("log")
+    ax2.set_xlim(analyzer.f_min, analyzer.f_max)
+    ax2.set_ylim(-60, 0)
+    bm = BlitManager(canvas, [line1, line2])
+    canvas.draw()
+    return bm, line1, line2
+
+
+_root = None
+
+
+def make_raster(chunk_size, analyzer):
+    """
+    The same two plots drawn by a `RasterCanvas` in a hidden Tk window,
+    returning the canvas and traces, or None when there is no display
+    """
+    global _root
+    if _root is None:
+        try:
+            _root = tk.Tk()
+        except tk.TclError as e:
+            print(f"Skipping render_raster: {e}", file=sys.stderr)
+            _root = False
+        else:
+            _root.withdraw()
+    if not _root:
+        return None
+    fig = Figure(figsize=(16, 9), dpi=100)
+    ax1 = fig.add_subplot(2, 1, 1)
+    line1, = ax1.plot(np.arange(chunk_size)/SAMPLING_RATE, np.zeros(chunk_size))
+    ax1.set_xlim(0, 0.125*chunk_size/SAMPLING_RATE)
+    ax1.set_ylim(-1, 1)
+    ax2 = fig.add_subplot(2, 1, 2)
+    frequencies = analyzer.frequencies(chunk_size)
+    line2, = ax2.plot(frequencies, np.zeros(len(frequencies)))
+    ax2.set_xscale("log")
+    ax2.set_xlim(analyzer.f_min, analyzer.f_max)
+    ax2.set_ylim(-60, 0)
+    canvas = RasterCanvas(_root, fig, [line1, line2])
+    # The hidden window is never configured, so size it as the figure
+    canvas.resize(1600, 900)
+    trace1 = canvas.trace(line1, np.arange(chunk_size)/SAMPLING_RATE)
+    trace2 = canvas.trace(line2, frequencies)
+    canvas.update()
+    return canvas, trace1, trace2
+
+
+def stage_benchmarks(chunk_size, read_size):
+    """
+    Build the benchmark callables for one parameter combination
+    """
+    analyzer = SpectrumAnalyzer(SAMPLING_RATE)
+    raw = PluckSource(sampling_rate=SAMPLING_RATE).read(4*chunk_size)
+    block = raw[:read_size]
+    ring = SampleRing(2*chunk_size)
+    ring.extend(raw)
+    data = (raw[-chunk_size:] - np.average(raw[-chunk_size:]))/128
+    window = np.hanning(chunk_size)
+    windowed = window * data
+    spectrum = rfft(windowed)
+    psd = analyzer.psd(raw[-chunk_size:])
+    frequencies = analyzer.frequencies(chunk_size)
+    peak_freq, _ = analyzer.find_peak(psd, frequencies, THRESHOLD)
+    bm, line1, line2 = make_figure(chunk_size, analyzer)
+    raster = make_raster(chunk_size, analyzer)
+
+    # Hop of one read so the spectrum is recomputed on every call
+    spectral = StreamingSpectrum(chunk_size, read_size, analyzer)
+
+    def end_to_end():
+        ring.extend(block)
+        spectral.update(ring)
+        peak_freq, _ = analyzer.find_peak(spectral.psd, frequencies, THRESHOLD)
+        closest_note(peak_freq, standard_tuning)
+        view = ring.latest(chunk_size)
+        line1.set_ydata((view - np.average(view))/128)
+        line2.set_ydata(spectral.psd)
+        bm.update()
+
+    stages = {
+        "ring_append": lambda: ring.extend(block),
+        "ring_view": lambda: ring.latest(chunk_size),
+        "ring_copy": lambda: np.array(ring.latest(chunk_size)),
+        "dc_normalise": lambda: (raw[-chunk_size:] - np.average(raw[-chunk_size:]))/128,
+        "hann_window": lambda: window * data,
+        "fft": lambda: fft(windowed),
+        "rfft": lambda: rfft(windowed),
+        "psd_db": lambda: 10*np.log10((spectrum * np.conjugate(spectrum)).real / chunk_size),
+        "band_psd": lambda: analyzer.psd(raw[-chunk_size:]),
+        "find_peaks": lambda: analyzer.find_peak(psd, frequencies, THRESHOLD),
+        "tune": lambda: closest_note(peak_freq, standard_tuning),
+        "render": lambda: (line1.set_ydata(data), line2.set_ydata(psd), bm.update()),
+        "end_to_end": end_to_end,
+    }
+    if raster is not None:
+        canvas, trace1, trace2 = raster
+        stages["render_raster"] = lambda: (trace1.update(data), trace2.update(psd), canvas.update())
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """
+    Print the speed-up of each result over the matching baseline result
+    to stderr, keeping stdout for the JSON report
+    """
+    old = {(b["stage"], b["chunk_size"], b["read_size"]): b for b in baseline["results"]}
+    print(f"{'stage':<14}{'chunk':>8}{'read':>7}{'old ops/s':>13}{'new ops/s':>13}{'ratio':>8}", file=sys.stderr)
+    for r in results:
+        b = old.get((r["stage"], r["chunk_size"], r["read_size"]))
+        if b is not None:
+            print(f"{r['stage']:<14}{r['chunk_size']:>8}{str(r['read_size'] or '-'):>7}"
+                  f"{b['ops_per_sec']:>13.1f}{r['ops_per_sec']:>13.1f}{r['ops_per_sec']/b['ops_per_sec']:>8.2f}",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the tuner pipeline stages")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=CHUNK_SIZES)
+    parser.add_argument("--read-sizes", type=int, nargs="+", default=READ_SIZES)
+    parser.add_argument("--stages", nargs="+", help="only run these stages")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each stage")
+    parser.add_argument("--output", help="write results as JSON to this file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to print speed-ups against")
+    args = parser.parse_args()
+
+    results = []
+    for chunk_size in args.chunk_sizes:
+        for i, read_size in enumerate(args.read_sizes):
+            for stage, func in stage_benchmarks(chunk_size, read_size).items():
+                if args.stages and stage not in args.stages:
+                    continue
+                if stage not in READ_STAGES and i > 0:
+                    continue
+                size = read_size if stage in READ_STAGES else None
+                result = {"stage": stage, "chunk_size": chunk_size, "read_size": size}
+                result.update(measure(func, args.min_time))
+                results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    else:
+        print(json.dumps(report, indent=1))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
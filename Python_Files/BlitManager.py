@@ -1,5 +1,8 @@
+from matplotlib.transforms import Bbox
+
+
 class BlitManager:
-    def __init__(self, canvas, animated_artists=()):
+    def __init__(self, canvas, animated_artists=(), static_artists=(), pad=2):
         """
         Parameters
         ----------
@@ -10,13 +13,34 @@ class BlitManager:
 
         animated_artists : Iterable[Artist]
             List of the artists to manage
+
+        static_artists : Iterable[Artist]
+            Artists which rarely change, e.g. markers redrawn only when the
+            tuning changes. They are drawn once into a cached layer on top of
+            the background, beneath the animated artists, and only redrawn
+            when one of them changes.
+
+        pad : int
+            Pixels around each axes restored and blitted with it, for line
+            widths which spill over its edge.
+
+        Only the axes holding an artist which changed since the last update
+        are restored, redrawn and blitted. An artist has changed when it is
+        stale, which matplotlib's setters mark it as, or when it was passed
+        to `mark_dirty`.
         """
         self.canvas = canvas
+        self.pad = pad
         self._bg = None
+        self._layers = {}
         self._artists = []
+        self._static = []
+        self._dirty = set()
 
         for a in animated_artists:
             self.add_artist(a)
+        for a in static_artists:
+            self.add_artist(a, static=True)
         # grab the background on every draw
         self.cid = canvas.mpl_connect("draw_event", self.on_draw)
 
@@ -27,9 +51,10 @@ class BlitManager:
             if event.canvas != cv:
                 raise RuntimeError
         self._bg = cv.copy_from_bbox(cv.figure.bbox)
+        self._build_layers()
         self._draw_animated()
 
-    def add_artist(self, art):
+    def add_artist(self, art, static=False):
         """
         Add an artist to be managed.
 
@@ -41,31 +66,73 @@ class BlitManager:
             to be safe).  *art* must be in the figure associated with
             the canvas this class is managing.
 
+        static : bool
+
+            Draw the artist into the cached layer, see `BlitManager`.
+
         """
         if art.figure != self.canvas.figure:
             raise RuntimeError
         art.set_animated(True)
-        self._artists.append(art)
+        if static:
+            self._static.append(art)
+            self._bg = None # rebuild the layer
+        else:
+            self._artists.append(art)
+
+    def mark_dirty(self, *artists):
+        """Redraw *artists* on the next update even if they are not stale."""
+        self._dirty.update(artists)
+
+    def _bbox(self, ax):
+        """Padded region of an axes, or the figure for artists outside one."""
+        fig_bbox = self.canvas.figure.bbox
+        if ax is None:
+            return fig_bbox
+        bbox = ax.bbox.padded(self.pad)
+        return Bbox.intersection(bbox, fig_bbox) or fig_bbox
 
-    def _draw_animated(self):
-        """Draw all of the animated artists."""
+    def _axes(self):
+        """Every axes holding a managed artist."""
+        return {a.axes for a in self._artists + self._static}
+
+    def _build_layers(self):
+        """Draw the static artists over the background and cache each axes."""
+        cv = self.canvas
+        fig = cv.figure
+        cv.restore_region(self._bg)
+        for a in self._static:
+            fig.draw_artist(a)
+        self._layers = {ax: cv.copy_from_bbox(self._bbox(ax)) for ax in self._axes()}
+
+    def _draw_animated(self, axes=None):
+        """Draw the animated artists, only those in *axes* if given."""
         fig = self.canvas.figure
         for a in self._artists:
-            fig.draw_artist(a)
+            if axes is None or a.axes in axes:
+                fig.draw_artist(a)
 
     def update(self):
-        """Update the screen with animated artists."""
+        """Update the screen with the animated artists which changed."""
         cv = self.canvas
-        fig = cv.figure
         # paranoia in case we missed the draw event,
         if self._bg is None:
             self.on_draw(None)
-        else:
-            # restore the background
-            cv.restore_region(self._bg)
-            # draw all of the animated artists
+            cv.blit(cv.figure.bbox)
+        elif any(a.stale or a in self._dirty for a in self._static):
+            # a static artist changed, rebuild the layer and every axes
+            self._build_layers()
             self._draw_animated()
-            # update the GUI state
-            cv.blit(fig.bbox)
-        # let the GUI event loop process anything it has to do
-        cv.flush_events()
\ No newline at end of file
+            for ax in self._layers:
+                cv.blit(self._bbox(ax))
+        else:
+            dirty = {a.axes for a in self._artists if a.stale or a in self._dirty}
+            for ax in dirty:
+                # restore the layer and redraw every artist in the axes
+                cv.restore_region(self._layers[ax])
+            self._draw_animated(dirty)
+            for ax in dirty:
+                cv.blit(self._bbox(ax))
+        self._dirty.clear()
+        # Nothing is flushed here, the GUI event loop paints the blitted
+        # regions and handles its events once the caller returns to it
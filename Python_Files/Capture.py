@@ -0,0 +1,196 @@
+"""
+Streaming capture to disk and memory-mapped read-back
+
+A capture called ``name`` is stored as four files:
+
+- ``name.raw``: the samples, raw little-endian
+- ``name.idx``: one record per block of the running sample count at the end
+  of the block and the host time it was received
+- ``name.gaps``: one record per run of blocks dropped from the capture, of
+  the sample number where they are missing, the number of samples lost and
+  the host time the last of them was received
+- ``name.json``: sample type and rate
+
+An 8-bit ``.raw`` file can be replayed directly with ``GUI.py --replay``.
+
+"""
+import json
+import queue
+import threading
+import time
+import numpy as np
+
+
+INDEX_TYPE = np.dtype([("end", "<i8"), ("time", "<f8")])
+GAP_TYPE = np.dtype([("start", "<i8"), ("length", "<i8"), ("time", "<f8")])
+
+
+class CaptureWriter(threading.Thread):
+    def __init__(self, path, dtype=np.uint8, sampling_rate=20000, max_blocks=256):
+        """
+        Background thread which appends blocks of samples to a capture.
+
+        `write` only copies the block onto a bounded queue, so the caller
+        never waits on the disk. If the disk falls behind far enough to fill
+        the queue, blocks are dropped rather than buffered without limit,
+        and each run of dropped blocks is recorded in the gaps file, so times
+        read back after it stay right.
+
+        Parameters
+        ----------
+        path : str
+            Capture name, without extension.
+
+        dtype : numpy dtype
+            Sample type.
+
+        sampling_rate : float
+            Sample rate in Hz, stored with the capture.
+
+        max_blocks : int
+            Largest number of blocks waiting to be written.
+        """
+        super().__init__(daemon=True)
+        self.path = path
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.samples_written = 0
+        self.dropped_blocks = 0
+        self.samples_lost = 0
+        self._queue = queue.Queue(max_blocks)
+        self._closing = threading.Event()
+        # Samples dropped since the last queued block and the time of the
+        # last of them
+        self._lost = 0
+        self._lost_time = None
+        with open(path + ".json", "w") as f:
+            json.dump({"dtype": self.dtype.str, "sampling_rate": sampling_rate}, f)
+        self._data = open(path + ".raw", "wb")
+        self._index = open(path + ".idx", "wb")
+        self._gaps = open(path + ".gaps", "wb")
+
+    def write(self, samples, timestamp=None):
+        """Queue a block of samples for writing, never blocking."""
+        if len(samples) == 0:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        block = np.array(samples, dtype=self.dtype)
+        try:
+            self._queue.put_nowait((block, timestamp, self._lost, self._lost_time))
+        except queue.Full:
+            self.dropped_blocks += 1
+            self.samples_lost += len(block)
+            self._lost += len(block)
+            self._lost_time = timestamp
+        else:
+            self._lost = 0
+
+    def _gap(self, length, timestamp):
+        record = np.array([(self.samples_written, length, timestamp)], dtype=GAP_TYPE)
+        self._gaps.write(record.tobytes())
+
+    def run(self):
+        """Write queued blocks until `close` is called."""
+        while True:
+            try:
+                block, timestamp, lost, lost_time = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._closing.is_set():
+                    break
+                continue
+            if lost:
+                self._gap(lost, lost_time)
+            self._data.write(block.tobytes())
+            self.samples_written += len(block)
+            record = np.array([(self.samples_written, timestamp)], dtype=INDEX_TYPE)
+            self._index.write(record.tobytes())
+        if self._lost:
+            # Blocks dropped after the last one written
+            self._gap(self._lost, self._lost_time)
+        self._data.close()
+        self._index.close()
+        self._gaps.close()
+
+    def close(self, timeout=None):
+        """
+        Write out everything queued and close the files, waiting at most
+        *timeout* seconds for the disk.
+        """
+        self._closing.set()
+        if self.is_alive():
+            self.join(timeout)
+        else:
+            self.run()
+
+
+class CaptureReader:
+    def __init__(self, path):
+        """
+        Memory-mapped view of a capture, so captures of any length can be
+        sliced without loading them into RAM.
+
+        Parameters
+        ----------
+        path : str
+            Capture name, without extension.
+        """
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        self.sampling_rate = meta["sampling_rate"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.samples = self._map(path + ".raw", self.dtype)
+        self.index = self._map(path + ".idx", INDEX_TYPE)
+        # Runs of dropped blocks, see `GAP_TYPE`
+        self.gaps = self._map(path + ".gaps", GAP_TYPE)
+
+    @staticmethod
+    def _map(filename, dtype):
+        """Read-only memory map, tolerating an empty file."""
+        try:
+            return np.memmap(filename, dtype=dtype, mode="r")
+        except ValueError:
+            return np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, key):
+        return self.samples[key]
+
+    @property
+    def duration(self):
+        """Length of the capture in seconds at the nominal sample rate."""
+        return len(self.samples) / self.sampling_rate
+
+    def sample_times(self, start, stop):
+        """
+        Host receive time of samples *start* to *stop*.
+
+        The samples of each block are spread evenly from the time of the
+        block before it to the block's own timestamp, or from the time of
+        the last dropped block when a gap comes before it.
+        """
+        ends = np.asarray(self.index["end"])
+        times = np.asarray(self.index["time"])
+        samples = np.arange(start, stop)
+        if len(ends) == 0:
+            return np.full(len(samples), np.nan)
+        # Each block runs on from the last sample and time before it
+        previous = np.concatenate(([-1], ends[:-1] - 1))
+        previous_times = np.concatenate((times[:1], times[:-1]))
+        following = np.searchsorted(ends, self.gaps["start"], side="right")
+        inside = following < len(ends)
+        previous_times[following[inside]] = self.gaps["time"][inside]
+
+        block = np.minimum(np.searchsorted(ends - 1, samples), len(ends) - 1)
+        fraction = np.clip((samples - previous[block]) / (ends[block] - 1 - previous[block]), 0, 1)
+        return previous_times[block] + fraction*(times[block] - previous_times[block])
+
+    def between(self, t0, t1):
+        """Samples received between host times *t0* and *t1*."""
+        ends = self.index["end"]
+        times = self.index["time"]
+        first = np.searchsorted(times, t0)
+        last = np.searchsorted(times, t1, side="right")
+        start = ends[first - 1] if first > 0 else 0
+        stop = ends[last - 1] if last > 0 else 0
+        return self.samples[start:stop]
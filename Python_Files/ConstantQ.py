@@ -0,0 +1,95 @@
+import numpy as np
+from scipy.fft import rfft, next_fast_len
+from scipy.sparse import csr_matrix
+
+
+class ConstantQ:
+    def __init__(self, sampling_rate, f_min=30, f_max=1000, bins_per_octave=48, cycles=16,
+                 full_scale=128, reference_size=8192, sparsity=0.0054):
+        """
+        Constant-Q spectrum on a log frequency grid (Brown & Puckette, 1992).
+
+        Bin k is the Hann-windowed DFT term at its centre frequency over
+        *cycles* periods of that frequency, so high strings are measured
+        from a short window and low strings from a long one. Every window
+        ends on the newest sample. The kernels are transformed to the
+        frequency domain once, small values are dropped, and each spectrum
+        is then one real FFT followed by a sparse matrix product.
+
+        Parameters
+        ----------
+        sampling_rate : float
+            Sample rate in Hz.
+
+        f_min, f_max : float
+            Band in Hz, the first bin is at *f_min*.
+
+        bins_per_octave : int
+            Resolution of the log frequency grid.
+
+        cycles : float
+            Periods of each bin's frequency in its window.
+
+        full_scale : float
+            Sample amplitude which normalises to 1, 128 for 8-bit samples.
+
+        reference_size : int
+            Levels are scaled so a steady tone reads the same as in a
+            `SpectrumAnalyzer.psd` of this many samples, so thresholds and
+            axis limits carry over.
+
+        sparsity : float
+            Kernel values smaller than this fraction of each kernel's peak
+            are dropped.
+        """
+        self.sampling_rate = sampling_rate
+        self.bins_per_octave = bins_per_octave
+        n_bins = int(np.floor(bins_per_octave*np.log2(f_max/f_min))) + 1
+        self.frequencies = f_min * 2**(np.arange(n_bins)/bins_per_octave)
+        # Window length of each bin in samples
+        self.lengths = np.ceil(cycles*sampling_rate/self.frequencies).astype(int)
+        self.window_size = next_fast_len(int(self.lengths[0]))
+
+        # Temporal kernels right-aligned in the frame, scaled so power
+        # matches a `reference_size` PSD, then moved to the frequency domain
+        n = self.window_size
+        kernels = np.zeros((n_bins, n), dtype=np.complex128)
+        for k, (f, length) in enumerate(zip(self.frequencies, self.lengths)):
+            t = np.arange(length)
+            scale = np.sqrt(reference_size) / length / full_scale
+            kernels[k, n - length:] = np.hanning(length) * np.exp(-2j*np.pi*f*t/sampling_rate) * scale
+        # sum x k = (1/n) sum X conj(fft(conj k)), only the positive
+        # frequencies of the real input are needed
+        spectra = np.conj(np.fft.fft(np.conj(kernels), axis=1))[:, :n//2 + 1] / n
+        spectra[np.abs(spectra) < sparsity*np.abs(spectra).max(axis=1, keepdims=True)] = 0
+        self.kernel = csr_matrix(spectra)
+
+        self._x = np.empty(n)
+
+    def transform(self, samples, out=None):
+        """
+        Constant-Q PSD in dB of the newest `window_size` samples.
+
+        Fewer samples are padded with silence at the start.
+
+        Parameters
+        ----------
+        samples : ndarray
+            Raw samples.
+
+        out : ndarray
+            Optional preallocated output, one value per bin.
+        """
+        frame = samples[-self.window_size:]
+        pad = self.window_size - len(frame)
+        self._x[:pad] = 0
+        np.subtract(frame, np.mean(frame), out=self._x[pad:])
+        spectrum = self.kernel @ rfft(self._x)
+
+        if out is None:
+            out = np.empty(len(self.frequencies))
+        np.abs(spectrum, out=out)
+        out *= out
+        np.log10(out + 1e-20, out=out)
+        out *= 10
+        return out
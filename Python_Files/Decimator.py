@@ -0,0 +1,78 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+from SampleRing import SampleRing
+
+
+class Decimator:
+    def __init__(self, factor, capacity, numtaps=None, cutoff=0.8):
+        """
+        Streaming anti-aliased decimator from one `SampleRing` into another.
+
+        A linear-phase FIR low-pass filter is applied and only every
+        *factor*-th output is kept. Like a polyphase implementation, the
+        discarded outputs are never computed: each kept output is one dot
+        product of the taps with a strided window of the input, and all the
+        outputs due in a call are computed as one matrix product written
+        straight into the output ring. The last ``numtaps - 1`` inputs and
+        the phase of the next output are carried over between calls, so the
+        stream is filtered seamlessly across blocks.
+
+        Parameters
+        ----------
+        factor : int
+            Decimation factor.
+
+        capacity : int
+            Samples held by the output ring, `ring`.
+
+        numtaps : int
+            Filter length, ``32*factor + 1`` by default.
+
+        cutoff : float
+            Pass band edge as a fraction of the output Nyquist frequency.
+        """
+        self.factor = factor
+        numtaps = 32*factor + 1 if numtaps is None else numtaps
+        # Reversed so each output is a plain dot product with its window
+        self.taps = firwin(numtaps, cutoff/factor, window=("kaiser", 8))[::-1].copy()
+        self.ring = SampleRing(capacity, dtype=np.float64)
+        self._history = None
+        self._phase = 0
+        # Input sample number up to which the input has been consumed
+        self._index = 0
+
+    def update(self, ring, index=None):
+        """
+        Decimate every input sample which arrived since the last call.
+
+        Parameters
+        ----------
+        ring : SampleRing
+            Ring holding the full-rate samples.
+
+        index : int
+            Sample number to treat as the newest. Defaults to ``ring.index``.
+
+        Returns
+        -------
+        n : int
+            Number of samples added to `ring`.
+        """
+        index = ring.index if index is None else index
+        new = ring.latest(index - self._index, index)
+        self._index = index
+        if len(new) == 0:
+            return 0
+        if self._history is None:
+            # Start as if the signal had been at its first value forever
+            self._history = np.full(len(self.taps) - 1, float(new[0]))
+
+        x = np.concatenate((self._history, new))
+        windows = sliding_window_view(x, len(self.taps))[self._phase::self.factor]
+        self._phase += len(windows)*self.factor - len(new)
+        self._history = x[len(x) - len(self.taps) + 1:]
+
+        self.ring.extend_from(len(windows), lambda slot, offset: np.matmul(
+            windows[offset:offset + len(slot)], self.taps, out=slot))
+        return len(windows)
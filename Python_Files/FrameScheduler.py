@@ -0,0 +1,125 @@
+import time
+from collections import deque
+
+
+class FrameScheduler:
+    def __init__(self, root, callback, fps=30, idle_fps=5, hold=2.0, smoothing=0.9):
+        """
+        Pace a Tk animation at a target frame rate from the event loop.
+
+        Each frame is scheduled with `after` for whatever is left of its
+        period once the frame's own cost is taken off, so the loop neither
+        spins nor drifts, and Tk handles its events in between. When a frame
+        overruns its deadline the frames it missed are dropped rather than
+        run back to back to catch up: the next frame follows at once and the
+        schedule restarts from it. The analysis consumes every new sample,
+        so the dropped frames are merged into that one, and a frame costing
+        a little over the period still renders at nearly the requested
+        rate. While the window is hidden nothing is rendered, and while it
+        is hidden or the signal has been silent for *hold* seconds frames
+        are run at *idle_fps* instead.
+
+        Parameters
+        ----------
+        root : tk.Misc
+            Widget whose event loop runs the frames and whose visibility is
+            checked.
+
+        callback : callable
+            Called once per frame as ``callback(render)``. It should always
+            run the analysis and only draw when *render* is True.
+
+        fps : float
+            Requested frame rate.
+
+        idle_fps : float
+            Frame rate while hidden or silent.
+
+        hold : float
+            Seconds of silence before dropping to *idle_fps*.
+
+        smoothing : float
+            Weight of the previous value in the running average of the frame
+            cost.
+        """
+        self.root = root
+        self.callback = callback
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.hold = hold
+        self.smoothing = smoothing
+
+        # Running average of the seconds spent in a frame
+        self.cost = 0.0
+        # Frames dropped so far
+        self.dropped = 0
+
+        self._deadline = None
+        self._renders = deque()
+        self._silent_since = None
+        self._job = None
+
+    @property
+    def idle(self):
+        """True while frames run at the idle rate."""
+        return not self.visible or (self._silent_since is not None
+                                    and time.perf_counter() - self._silent_since >= self.hold)
+
+    @property
+    def visible(self):
+        """True unless the window is minimised or withdrawn."""
+        return bool(self.root.winfo_viewable())
+
+    @property
+    def achieved(self):
+        """Frames rendered per second over the last second."""
+        if len(self._renders) < 2:
+            return 0.0
+        return (len(self._renders) - 1)/(self._renders[-1] - self._renders[0])
+
+    @property
+    def requested(self):
+        """Frame rate currently aimed for."""
+        return self.idle_fps if self.idle else self.fps
+
+    def set_silent(self, silent):
+        """Tell the scheduler whether the signal is currently silent."""
+        if not silent:
+            self._silent_since = None
+        elif self._silent_since is None:
+            self._silent_since = time.perf_counter()
+
+    def start(self):
+        """Schedule the first frame."""
+        self._deadline = time.perf_counter()
+        self._job = self.root.after(1, self._run)
+
+    def stop(self):
+        """Cancel the next frame."""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def status(self):
+        """Achieved and requested frame rate for display."""
+        return "FPS: {:.1f}/{:g}".format(self.achieved, self.requested)
+
+    def _run(self):
+        start = time.perf_counter()
+        render = self.visible
+        self.callback(render)
+        end = time.perf_counter()
+        self.cost = end - start if self.cost == 0 else self.smoothing*self.cost + (1 - self.smoothing)*(end - start)
+
+        if render:
+            self._renders.append(end)
+        while self._renders and self._renders[0] < end - 1:
+            self._renders.popleft()
+
+        # Drop the frames whose deadlines passed instead of catching up
+        period = 1/self.requested
+        self._deadline += period
+        if end > self._deadline:
+            self.dropped += int((end - self._deadline)/period) + 1
+            self._deadline = end
+        self._job = self.root.after(max(1, int(1000*(self._deadline - end))), self._run)
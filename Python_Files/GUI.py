@@ -6,8 +6,8 @@ Author: Charlie Brunt
 """
 import sys
 import os
+import argparse
 import tkinter as tk
-import time
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as font_manager
@@ -15,11 +15,25 @@ import seaborn as sns
 import serial
 import serial.tools.list_ports
 import customtkinter
-from numpy_ringbuffer import RingBuffer
-from scipy.fft import fft, fftfreq, fftshift
-from scipy.signal import find_peaks
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from BlitManager import BlitManager
+from FrameScheduler import FrameScheduler
+from PlotDecimator import PlotDecimator
+from RasterCanvas import RasterCanvas
+from SerialReader import SerialReader
+from SampleRing import SampleRing
+from StreamingSpectrum import StreamingSpectrum
+from Decimator import Decimator
+from ConstantQ import ConstantQ
+from SpectrumAnalyzer import SpectrumAnalyzer, ESTIMATORS
+from PitchDetector import FFTDetector, YinDetector, McLeodDetector, HarmonicDetector, ZoomDetector
+from StrumTuner import StrumTuner
+from OnsetDetector import OnsetDetector, NoteSegmenter
+from PitchTracker import PitchTracker
+from Tunings import tunings, tuning_labels, standard_tuning, chromatic_notes, note_index, closest_note
+from PacketDecoder import PacketDecoder
+from Capture import CaptureWriter
+from VirtualSerial import VirtualSerial, PluckSource, open_source
 from PIL import Image, ImageTk
 
 
@@ -39,79 +53,145 @@ def connect_to_arduino(baud_rate, serial_number="95530343834351A0B091"):
     raise IOError("No Arduino found")
 
 
-def animate():
+def open_port(args):
     """
-    Update plotted data on graphs
+    Open the Arduino, or a virtual port when replaying or synthesising
     """
-    # Update data
-    bits = port.read(CHUNK_SIZE//60) # ~ 30 fps
-    decoded_bits = np.frombuffer(bits, dtype=np.uint8)
-    r.extend(decoded_bits)
-    data = np.array(r) # np.frombuffer(bit_data, dtype=np.uint8)
-    data = (data - np.average(data))/128 # remove DC offset and normalise
-    line1.set_ydata(np.pad(data, (0, CHUNK_SIZE - len(data)))) # Plot waveform
-
-    # Hann window
-    windowed_data = np.hanning(len(data)) * data
-
-    # Calculate spectrum
-    spectrum = fft(windowed_data)
-    # psd = 20*np.log10(np.abs(spectrum))
-    psd = 10*np.log10(np.abs((spectrum * np.conjugate(spectrum) / CHUNK_SIZE).real))
-    line2.set_ydata(np.pad(fftshift(psd), (0, CHUNK_SIZE - len(data)))) # Plot spectrum
-
-    # Find peaks
-    peaks, _ = find_peaks(psd, height=THRESHOLD)
-    if peaks.size == 0:
-        # If no peaks over threshold, give the strongest frequency
-        peak_freq_index = np.argmax(psd)
-        peak = psd[peak_freq_index]
-        peak_freq = frequencies[peak_freq_index]
+    speed = args.speed if args.speed > 0 else None
+    if args.replay:
+        return VirtualSerial(open_source(args.replay, SAMPLING_RATE), speed)
+    if args.synth:
+        return VirtualSerial(PluckSource(sampling_rate=SAMPLING_RATE), speed)
+    return connect_to_arduino(BAUD_RATE)
+
+
+def animate(render=True):
+    """
+    Analyse the new samples and, if *render*, update plotted data on graphs.
+    Called by the frame scheduler
+    """
+    # Update data from the latest snapshot of the acquisition thread
+    data, index = reader.snapshot(CHUNK_SIZE)
+    if len(data) == 0:
+        return
+    if render:
+        data = (data - np.average(data))/FULL_SCALE # remove DC offset and normalise
+        waveform_plot.update(np.pad(data, (0, CHUNK_SIZE - len(data)))) # Plot waveform
+
+    # Analysis runs on the decimated stream when decimation is enabled
+    if decimator is not None:
+        decimator.update(r, index)
+        a, a_index = decimator.ring, decimator.ring.index
     else:
-        # Find fundamental peak
-        fundamental_index = peaks[0]
-        peak = psd[fundamental_index]
-        peak_freq = frequencies[fundamental_index]
-
-    # Call tuning function
-    closest_note_freq = tune(peak_freq, peak, tuning)
-
-    # Update peak label and line segment between peak and closest note
-    if peak > -50 and peak_freq > 30:
-        hline.set_ydata([peak,peak])
-        hline.set_xdata([peak_freq, closest_note_freq])
-        pklabel.set_text('{:.2f} Hz'.format(peak_freq))
-        pklabel.set_position((max(40, peak_freq), max(-50, min(YLIM - 3, peak + 1.76))))
+        a, a_index = r, index
+
+    # Spectrum only changes once a hop's worth of new samples has arrived
+    global display_psd, spectrum_pending
+    new_spectrum = spectrum.update(a, a_index)
+    if new_spectrum:
+        if cqt is not None:
+            display_psd = cqt.transform(a.latest(cqt.window_size, a_index), display_psd)
+        else:
+            display_psd = spectrum.psd
+        scheduler.set_silent(display_psd.max() < SILENCE)
+        spectrum_pending = True
+    if render and spectrum_pending:
+        spectrum_plot.update(display_psd) # Plot spectrum
+        spectrum_pending = False
+
+    # Estimate the fundamental. With onsets, each note is measured once
+    # after its attack; otherwise the FFT detectors reuse the spectrum while
+    # the other detectors run on the newest samples every frame
+    global last_event
+    if segmenter is not None:
+        for event in segmenter.update(a, a_index):
+            last_event = event
+        pitch = segmenter.pitch
+        estimate = (pitch, 1.0) if pitch is not None else (0.0, 0.0)
+        if display_psd is None:
+            estimate = None
+    elif isinstance(detector, FFTDetector):
+        estimate = detector.detect_psd(spectrum.psd, frequencies) if new_spectrum else None
+    elif spectrum.psd is not None:
+        estimate = detector.detect(a.latest(detector.window_size, a_index))
     else:
-        hline.set_ydata([0,0])
-        hline.set_xdata([0,0])
-        pklabel.set_text("")
+        estimate = None
+
+    # No estimate from windows holding samples filled in for lost packets,
+    # they would read as a dip to silence
+    gap = reader.filled(FFT_SIZE*DECIMATION, index) > 0
+    if gap:
+        estimate = None
+
+    # Strum mode measures every string once per new spectrum
+    global pending_meter, pending_peak
+    if strum_mode and new_spectrum and not gap:
+        cents, _, sounding = strum.measure(a.latest(strum.window_size, a_index))
+        pending_meter = (cents, sounding)
+
+    if estimate is not None:
+        peak_freq, confidence = estimate
+        peak = np.interp(peak_freq, display_frequencies, display_psd) # level for plotting
+
+        # Call tuning function
+        closest_note_freq = tune(peak_freq, confidence)
+        pending_peak = (peak, peak_freq, closest_note_freq)
+
+    # Widgets and labels are only updated in rendered frames, with the
+    # latest results of the frames merged into them
+    if not render:
+        return
+
+    show_changes(pending_changes)
+    pending_changes.clear()
+    if pending_meter is not None:
+        update_meter(*pending_meter)
+        pending_meter = None
+
+    if pending_peak is not None:
+        peak, peak_freq, closest_note_freq = pending_peak
+        pending_peak = None
+
+        # Update peak label and line segment between peak and closest note
+        if peak > SILENCE and peak_freq > 30:
+            hline.set_ydata([peak,peak])
+            hline.set_xdata([peak_freq, closest_note_freq])
+            pklabel.set_text('{:.2f} Hz'.format(peak_freq))
+            pklabel.set_position((max(40, peak_freq), max(-50, min(YLIM - 3, peak + 1.76))))
+        else:
+            hline.set_ydata([0,0])
+            hline.set_xdata([0,0])
+            pklabel.set_text("")
 
-    global timer
-    temp = time.time()
-    fr_number.set_text("FPS: {:.1f}".format(1.0 / (temp - timer)))
-    timer = temp
+    status = "{}  Overruns: {}".format(scheduler.status(), reader.overruns)
+    if reader.decoder is not None:
+        status += "  Lost: {:.1%}".format(reader.decoder.loss_rate)
+    if last_event is not None:
+        status += "  Last note: {} {:+.1f} c, {:.1f} s".format(last_event.note, last_event.cents, last_event.decay)
+    fr_number.set_text(status)
 
     # Update tuning lines
     global change_tuning
     if change_tuning:
         change_tuning = False
-        i = 0
-        for note in tuning:
-            f = tuning[note]
-            note_lines[i].set_xdata([f])
-            note_labels[i].set_text(note)
-            note_labels[i].set_position((f, YLIM - 3))
-            freq_labels[i].set_text(f)
-            freq_labels[i].set_position((f, -59.2))
-            i += 1
+        # No lines for the chromatic tuning, it has too many notes
+        notes = list(tuning.items()) if len(tuning) <= len(note_lines) else []
+        for i in range(len(note_lines)):
+            visible = i < len(notes)
+            note_lines[i].set_visible(visible)
+            note_labels[i].set_visible(visible)
+            freq_labels[i].set_visible(visible)
+            if visible:
+                note, f = notes[i]
+                note_lines[i].set_xdata([f])
+                note_labels[i].set_text(note)
+                note_labels[i].set_position((f, YLIM - 3))
+                freq_labels[i].set_text(f)
+                freq_labels[i].set_position((f, -59.2))
 
     # Update the canvas
     bm.update()
 
-    # Schedule the next update
-    root.after(1, animate)
-
 
 def toggle_distortion():
     """
@@ -123,71 +203,127 @@ def toggle_distortion():
     if distortion_enabled:
         pedalimg = ImageTk.PhotoImage(Image.open(resource_path("assets/pedal_on.png")).resize((320,512)))
         pedal_btn.config(image=pedalimg)
-        port.write(1)
+        reader.write(1)
     else:
         pedalimg = ImageTk.PhotoImage(Image.open(resource_path("assets/pedal.png")).resize((320,512)))
         pedal_btn.config(image=pedalimg)
-        port.write(2)
+        reader.write(2)
     # print(distortion_enabled)
 
 
-def tune(peak_frequency, peak, tuning):
+def tune(peak_frequency, confidence):
     """
-    Find closest note and handle GUI updates with tuning instructions
+    Track the pitch and keep the displayed values which changed for the
+    next rendered frame
     """
-    global tuning_state
-    prev_tuning_state = tuning_state
-    closest_note, note_freq = min(tuning.items(), key=lambda x: abs(peak_frequency - x[1]))
-    error = round(peak_frequency - note_freq, 1)
-    try:
-        error_c = round(1200 * np.log2(peak_frequency/note_freq), 1)
-    except:
-        error_c = 0
-    if peak > THRESHOLD and peak_frequency > 30:
-        if abs(error) < 1:
-            # In tune
-            tuning_state = "In Tune   "
-            if tuning_state != prev_tuning_state:
-                tunervar.set(tuning_state)
-                note_frame.configure(border_color="#32C671")
-                tuner_instruction.config(image=equalimg)
-                tuner_instruction.image = equalimg
-        elif error < 0:
-            # Flat
-            tuning_state = "Tune Up"
-            if tuning_state != prev_tuning_state:
-                tunervar.set(tuning_state)
-                note_frame.configure(border_color="#1a1a1a")
-                tuner_instruction.config(image=upimg)
-                tuner_instruction.image = upimg
+    pending_changes.update(tracker.update(peak_frequency, confidence))
+
+    if tracker.note_freq is not None:
+        return tracker.note_freq
+    return closest_note(peak_frequency, tuning_index)[1]
+
+
+def show_changes(changes):
+    """
+    Update the tuning instructions with the displayed values which changed
+    """
+    if "state" in changes:
+        state = changes["state"]
+        if state == "in tune":
+            tunervar.set("In Tune   ")
+            note_frame.configure(border_color="#32C671")
+            image = equalimg
+        elif state == "flat":
+            tunervar.set("Tune Up")
+            note_frame.configure(border_color="#1a1a1a")
+            image = upimg
+        elif state == "sharp":
+            tunervar.set("Tune Down")
+            note_frame.configure(border_color="#1a1a1a")
+            image = downimg
         else:
-            # Sharp
-            tuning_state = "Tune Down"
-            if tuning_state != prev_tuning_state:
-                tunervar.set(tuning_state)
-                note_frame.configure(border_color="#1a1a1a")
-                tuner_instruction.config(image=downimg)
-                tuner_instruction.image = downimg
-        notevar.set(closest_note)
-        note_freq_var.set(f"{note_freq} Hz")
-        if error_unit_var.get() == "Hz":
-            freq_diff_var.set(f"{error} Hz")
+            # Below threshold
+            tunervar.set(" ")
+            note_frame.configure(border_color="#1a1a1a")
+            image = noteimg
+        tuner_instruction.config(image=image)
+        tuner_instruction.image = image
+    if "note" in changes:
+        notevar.set(changes["note"] or "-")
+    if "note_freq" in changes:
+        note_freq = changes["note_freq"]
+        note_freq_var.set(" " if note_freq is None else f"{note_freq} Hz")
+    if "error" in changes or "error_c" in changes:
+        show_error()
+    if "frequency" in changes:
+        frequency = changes["frequency"]
+        peak_freq_var.set("-" if frequency is None else f"{frequency} Hz")
+
+
+def show_error():
+    """
+    Show the tracked error in the selected units
+    """
+    if error_unit_var.get() == "Hz":
+        error = tracker.displayed["error"]
+        freq_diff_var.set("-" if error is None else f"{error} Hz")
+    else:
+        error_c = tracker.displayed["error_c"]
+        freq_diff_var.set("-" if error_c is None else f"{error_c} c")
+
+
+def draw_meter():
+    """
+    Draw the per-string meter of strum mode for the current tuning
+    """
+    meter.delete("all")
+    meter_markers.clear()
+    meter_values.clear()
+    width = int(meter["width"])
+    row = int(meter["height"]) // len(tuning)
+    left, right = 60, width - 70
+    for i, note in enumerate(tuning):
+        y = row*i + row//2
+        meter.create_text(left - 30, y, text=note, fill="white", font=(font_name, 14))
+        meter.create_line(left, y, right, y, fill="#3a3a3a", width=2)
+        meter.create_line((left + right)//2, y - row//3, (left + right)//2, y + row//3, fill="#5f5f5f", width=2)
+        meter_markers.append(meter.create_oval(0, 0, 0, 0, fill="#5f5f5f", outline=""))
+        meter_values.append(meter.create_text(right + 40, y, text="-", fill="white", font=(font_name, 12)))
+
+
+def update_meter(cents, sounding):
+    """
+    Move each string's marker to its error in cents
+    """
+    width = int(meter["width"])
+    row = int(meter["height"]) // len(tuning)
+    left, right = 60, width - 70
+    span = strum.offsets[-1]
+    for i, (c, on) in enumerate(zip(cents, sounding)):
+        y = row*i + row//2
+        x = (left + right)/2 + c/span*(right - left)/2
+        meter.coords(meter_markers[i], x - 7, y - 7, x + 7, y + 7)
+        if not on:
+            colour, text = "#5f5f5f", "-"
         else:
-            freq_diff_var.set(f"{error_c} c")
-        peak_freq_var.set(f"{round(peak_frequency, 1)} Hz")
+            colour = "#32C671" if abs(c) < 5 else "#7951FF"
+            text = "{:+.0f} c".format(c)
+        meter.itemconfig(meter_markers[i], fill=colour)
+        meter.itemconfig(meter_values[i], text=text)
+
+
+def toggle_strum():
+    """
+    Switch between single-string tuning and strum mode
+    """
+    global strum_mode
+    strum_mode = strum_var.get()
+    if strum_mode:
+        tuner_instruction.pack_forget()
+        meter.pack(expand=True, padx=20, pady=20, side=tk.TOP)
     else:
-        # Below threshold
-        tuning_state = " "
-        if tuning_state != prev_tuning_state:
-            tunervar.set(tuning_state)
-            note_frame.configure(border_color="#1a1a1a")
-            tuner_instruction.config(image=noteimg)
-            tuner_instruction.image = noteimg
-            notevar.set("-")
-        note_freq_var.set(" ")
-        freq_diff_var.set("-")
-        peak_freq_var.set("-")
-    return note_freq
+        meter.pack_forget()
+        tuner_instruction.pack(expand=True, padx=20, pady=20, side=tk.TOP)
 
 
 def select_tuning():
@@ -195,10 +331,26 @@ def select_tuning():
     Callback function to select a tuning
     """
     global tuning
+    global tuning_index
     global change_tuning
     change_tuning = True
     selection = var.get()
     tuning = tunings[selection]
+    tuning_index = note_index(tuning)
+    pending_changes.clear()
+    show_changes(tracker.set_tuning(tuning_index)) # clear the last note
+    if segmenter is not None:
+        segmenter.tuning = tuning_index
+
+    # Strum mode only makes sense for the strings of a fixed tuning
+    if len(tuning) > len(note_lines):
+        strum_var.set(False)
+        toggle_strum()
+        strum_switch.configure(state="disabled")
+    else:
+        strum_switch.configure(state="normal")
+        strum.set_tuning(tuning)
+        draw_meter()
 
 
 def toggle_units():
@@ -207,6 +359,7 @@ def toggle_units():
         error_unit_var.set("Cents")
     else:
         error_unit_var.set("Hz")
+    show_error()
 
 
 
@@ -215,10 +368,30 @@ def close_window():
     Callback function to stop executing code when closing a window
     """
     # root.destroy()
+    scheduler.stop()
+    reader.stop()
     sys.exit()
 
 
 if __name__== "__main__":
+    # Command line options for running without an Arduino
+    parser = argparse.ArgumentParser(description="Guitar Companion App")
+    parser.add_argument("--replay", metavar="PATH", help="replay a raw capture or WAV file instead of the Arduino")
+    parser.add_argument("--synth", action="store_true", help="use synthesised plucked strings instead of the Arduino")
+    parser.add_argument("--framed", action="store_true", help="firmware sends framed packets (FRAMED 1 in tuner_firmware.ino)")
+    parser.add_argument("--packed", action="store_true", help="firmware sends packed 10-bit samples (PACKED 1, implies --framed)")
+    parser.add_argument("--record", metavar="PATH", help="record received samples to PATH.raw with PATH.idx, PATH.gaps and PATH.json")
+    parser.add_argument("--estimator", default="gaussian", choices=ESTIMATORS, help="sub-bin peak frequency estimator")
+    parser.add_argument("--detector", default="fft", choices=["fft", "yin", "mpm", "hps", "hsum", "zoom"], help="pitch detection method")
+    parser.add_argument("--onsets", action="store_true", help="measure each pluck once after its attack instead of continuously")
+    parser.add_argument("--spectrum", default="fft", choices=["fft", "cq"], help="plot the FFT or a constant-Q spectrum")
+    parser.add_argument("--decimate", type=int, default=1, help="analyse the stream decimated by this factor, from 1 to 8")
+    parser.add_argument("--a4", type=float, default=440.0, help="reference pitch of A4 in Hz for the chromatic tuning")
+    parser.add_argument("--fps", type=float, default=30, help="requested frame rate, lowered while the window is hidden or the signal is silent")
+    parser.add_argument("--backend", default="mpl", choices=["mpl", "raster"], help="draw the plots with matplotlib or rasterise them directly, which is faster")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed relative to real time, 0 for as fast as possible")
+    args = parser.parse_args()
+
     # Set font family globally
     font_manager._load_fontmanager(try_read_cache=False)
     font_name = "Inter"
@@ -227,96 +400,96 @@ if __name__== "__main__":
     # global variables
     distortion_enabled = False
     change_tuning = False
-    timer = 0
-    tuning_state = " "
+    strum_mode = False
+    display_psd = None
+    spectrum_pending = False # new spectrum not yet plotted
+    pending_changes = {} # tracker changes not yet shown
+    pending_meter = None # strum measurement not yet shown
+    pending_peak = None # peak label not yet shown
+    last_event = None
 
     # Parameters
-    CHUNK_SIZE = 32768
+    CHUNK_SIZE = 32768 # samples held for the waveform
     SAMPLING_RATE = 20000
+    DECIMATION = args.decimate # analysis rate divider
+    DECIMATION_CUTOFF = 0.8 # decimator pass band edge, fraction of the analysis Nyquist frequency
+    ANALYSIS_RATE = SAMPLING_RATE/DECIMATION
+    FFT_SIZE = 8192//DECIMATION # samples per spectrum, sub-bin interpolation keeps +/- 0.5 Hz
     BAUD_RATE = 1000000
+    FPS = args.fps # requested frame rate
+    IDLE_FPS = min(5, FPS) # frame rate while hidden or silent
+    HOP_SIZE = FFT_SIZE//4 # samples between spectrum updates
     YLIM = 0 # dB
-    THRESHOLD = -15 # dB
-
-    # Ring buffer object
-    r = RingBuffer(capacity=CHUNK_SIZE, dtype=np.uint8)
-
-    # Tunings from https://pages.mtu.edu/~suits/notefreqs.html
-    standard_tuning = {
-        'E2': 82.4, # 82.4
-        'A2': 110.0,
-        'D3': 146.8,
-        'G3': 196.0,
-        'B3': 246.9,
-        'E4': 329.6
-    }
-
-    drop_d_tuning = {
-        'D2': 73.4,
-        'A2': 110.0,
-        'D3': 146.8,
-        'G3': 196.0,
-        'B3': 246.9,
-        'E4': 329.6
-    }
-
-    half_step_down_tuning = {
-        'Eb2': 77.8,
-        'Ab2': 103.8,
-        'Db3': 138.6,
-        'Gb3': 185.0,
-        'Bb3': 233.1,
-        'Eb4': 311.1
-    }
-
-    open_g_tuning = {
-        'D2': 73.4,
-        'G2': 98.0,
-        'D3': 146.8,
-        'G3': 196.0,
-        'B3': 246.9,
-        'D4': 293.7
-    }
+    SILENCE = -50 # dB, spectrum peak below which the signal counts as silent
+    THRESHOLD = -21 # dB, a tone 6 dB lower than at -15 dB with a 32768-point FFT
+    F_MIN = 30 # Hz
+    F_MAX = 1000 # Hz
+    # Highest decimation keeping F_MAX inside the decimator's pass band.
+    # Beyond it the spectrum would have to stop short of 1000 Hz and the
+    # time-domain detectors lose accuracy on the upper strings
+    MAX_DECIMATION = int(DECIMATION_CUTOFF*SAMPLING_RATE/(2*F_MAX))
+    if not 1 <= DECIMATION <= MAX_DECIMATION:
+        parser.error("--decimate must be from 1 to {}".format(MAX_DECIMATION))
+    MIN_CONFIDENCE = 0.5 # pitch detector confidence needed to show a note
+    DETECTOR_WINDOW = 2048//DECIMATION # samples, for the time-domain detectors
+    ZOOM_WINDOW = FFT_SIZE//2 # samples, for the zoom FFT detector
+
+    # Sample format, packed 10-bit samples always come in packets
+    args.framed = args.framed or args.packed
+    FULL_SCALE = 512 if args.packed else 128 # mid-scale ADC reading
+    SAMPLE_TYPE = np.uint16 if args.packed else np.uint8
+    # A tone's power in a spectrum grows with the FFT length, so scale the
+    # shorter decimated spectra back up to the full-rate levels
+    ANALYSIS_SCALE = FULL_SCALE/np.sqrt(DECIMATION)
+
+    # Ring buffer object, twice the analysis window so views outlive a frame
+    r = SampleRing(2*CHUNK_SIZE, dtype=SAMPLE_TYPE)
+
+    # Anti-aliased decimation ahead of the analysis, the waveform stays at
+    # the full rate
+    decimator = Decimator(DECIMATION, 2*CHUNK_SIZE//DECIMATION, cutoff=DECIMATION_CUTOFF) if DECIMATION > 1 else None
+
+    # Spectrum engine, band-limited and recomputed once per hop
+    analyzer = SpectrumAnalyzer(ANALYSIS_RATE, F_MIN, F_MAX, ANALYSIS_SCALE, estimator=args.estimator)
+    spectrum = StreamingSpectrum(FFT_SIZE, HOP_SIZE, analyzer)
+
+    # Optional constant-Q display, short windows for high notes and long
+    # ones for low notes on the plot's log frequency axis
+    cqt = ConstantQ(ANALYSIS_RATE, F_MIN, F_MAX, full_scale=ANALYSIS_SCALE, reference_size=FFT_SIZE) if args.spectrum == "cq" else None
+
+    # Pitch detector
+    if args.detector == "yin":
+        detector = YinDetector(ANALYSIS_RATE, F_MIN, F_MAX, DETECTOR_WINDOW, FULL_SCALE)
+    elif args.detector == "mpm":
+        detector = McLeodDetector(ANALYSIS_RATE, F_MIN, F_MAX, DETECTOR_WINDOW, FULL_SCALE)
+    elif args.detector in ("hps", "hsum"):
+        detector = HarmonicDetector(analyzer, THRESHOLD, FFT_SIZE, "product" if args.detector == "hps" else "sum")
+    elif args.detector == "zoom":
+        # Same sensitivity to a steady tone as THRESHOLD at FFT_SIZE
+        detector = ZoomDetector(analyzer, THRESHOLD + 10*np.log10(ZOOM_WINDOW/FFT_SIZE), ZOOM_WINDOW, ZOOM_WINDOW//2)
+    else:
+        detector = FFTDetector(analyzer, THRESHOLD, FFT_SIZE)
 
-    dadgad_tuning = {
-        'D2': 73.4,
-        'A2': 110.0,
-        'D3': 146.8,
-        'G3': 196.0,
-        'A3': 220.0,
-        'D4': 293.7
-    }
+    tunings[tuning_labels.index("Chromatic")] = chromatic_notes(args.a4)
+    tuning = standard_tuning
+    tuning_index = note_index(tuning)
 
-    open_d_tuning = {
-        'D2': 73.4,
-        'A2': 110.0,
-        'D3': 146.8,
-        'F#3': 185.0,
-        'A3': 220.0,
-        'D4': 293.7
-    }
+    # Smooths the estimates and reports which displayed values changed
+    tracker = PitchTracker(tuning_index, MIN_CONFIDENCE)
 
-    whole_step_down_tuning = {
-        'D2': 73.4,
-        'G2': 98.0,
-        'C3': 130.8,
-        'F3': 174.6,
-        'A3': 220.0,
-        'D4': 293.7
-    }
+    # Onset-aligned note measurement
+    segmenter = None
+    if args.onsets:
+        onsets = OnsetDetector(ANALYSIS_RATE, 1024//DECIMATION, 512//DECIMATION, FULL_SCALE)
+        segmenter = NoteSegmenter(onsets, detector, tuning_index,
+                                  min_confidence=MIN_CONFIDENCE)
 
-    tunings = [standard_tuning,
-               drop_d_tuning,
-               half_step_down_tuning,
-               open_g_tuning,
-               dadgad_tuning,
-               open_d_tuning,
-               whole_step_down_tuning]
-    
-    tuning_labels = ["Standard","Drop D","Half Step","Open G","DADGAD","Open D","Whole Step"]
-    tuning = standard_tuning
+    # Strum mode, every string of the tuning at once
+    strum = StrumTuner(ANALYSIS_RATE, tuning, FFT_SIZE, ANALYSIS_SCALE)
 
     # Frequency and time axes for plotting
-    frequencies = fftfreq(CHUNK_SIZE, 1/SAMPLING_RATE)
+    frequencies = spectrum.frequencies
+    display_frequencies = cqt.frequencies if cqt is not None else frequencies
     times = np.arange(CHUNK_SIZE)/SAMPLING_RATE
 
     # Create the Tkinter GUI window
@@ -406,16 +579,17 @@ if __name__== "__main__":
 
     # Frequency spectrum plot setup
     ax2 = fig.add_subplot(2, 1, 2)
-    line2, = ax2.plot(fftshift(frequencies), np.ones(CHUNK_SIZE), color="#7951FF")
+    line2, = ax2.plot(display_frequencies, np.ones(len(display_frequencies)), color="#7951FF")
     ax2.patch.set_alpha(0)
     ax2.set_xlabel('Frequency (Hz)')
     ax2.set_ylabel('Power Spectral Density (dB)')
     # ax2.set_yscale("log")
     ax2.set_xscale("log")
-    ax2.set_xlim(30, 1000)
+    ax2.set_xlim(F_MIN, F_MAX)
     ax2.set_ylim(-60, YLIM)
     ax2.grid(axis="x")
     pklabel = ax2.text(0, 0, '', va='center', fontdict=font)
+    pklabel.set_clip_on(True) # stay inside the region blitted for ax2
     fig.subplots_adjust(left=0.07, bottom=0.1, right=0.93, top=0.98, wspace=0.5, hspace=0.3)
 
     # Setup tuning lines
@@ -431,14 +605,28 @@ if __name__== "__main__":
     # Horizontal line
     hline, = ax2.plot([0,0], [0,0], ":", color="#afafaf", linewidth=1)
 
-    animated_artists = [line1, line2, pklabel, fr_number, hline] + note_lines + note_labels + freq_labels
+    animated_artists = [line1, line2, pklabel, fr_number, hline]
+    static_artists = note_lines + note_labels + freq_labels
+
+    if args.backend == "raster":
+        # Rasterise the plot straight into a Tk image, the figure only
+        # describes the layout and holds the artists
+        canvas = RasterCanvas(graph_frame, fig, animated_artists, static_artists, font_name, font['size'])
+        canvas.get_tk_widget().pack(side="top",fill='both', expand=True, padx=10, pady=10)
+        waveform_plot = canvas.trace(line1, times)
+        spectrum_plot = canvas.trace(line2, display_frequencies)
+        bm = canvas
+    else:
+        # Create a canvas widget to display the plot
+        canvas = FigureCanvasTkAgg(fig, master=graph_frame)
+        canvas.get_tk_widget().pack(side="top",fill='both', expand=True, padx=10, pady=10)
 
-    # Create a canvas widget to display the plot
-    canvas = FigureCanvasTkAgg(fig, master=graph_frame)
-    canvas.get_tk_widget().pack(side="top",fill='both', expand=True, padx=10, pady=10)
+        # Only plot what the axes can show at their current size
+        waveform_plot = PlotDecimator(line1, times)
+        spectrum_plot = PlotDecimator(line2, display_frequencies, mode="max")
 
-    # Create BlitManager object
-    bm = BlitManager(canvas, animated_artists)
+        # Create BlitManager object
+        bm = BlitManager(canvas, animated_artists, static_artists)
 
     # Tuning radio buttons
     radio_frame = customtkinter.CTkFrame(master=root, fg_color="#1a1a1a", height=30)
@@ -591,6 +779,17 @@ if __name__== "__main__":
     )
     tuner_frame_title.pack(side=tk.TOP, anchor=tk.NW, padx=10, pady=5)
 
+    strum_var = tk.BooleanVar()
+    strum_switch = customtkinter.CTkSwitch(
+        master=tuner_frame,
+        text="Strum",
+        variable=strum_var,
+        command=toggle_strum,
+        font=(font_name, 10),
+        progress_color="#7951FF",
+    )
+    strum_switch.pack(side=tk.TOP, anchor=tk.NE, padx=10)
+
     noteimg = ImageTk.PhotoImage(Image.open(resource_path("assets/note.png")).resize((150,150)))
     equalimg = ImageTk.PhotoImage(Image.open(resource_path("assets/equal.png")).resize((70,70)))
     upimg = ImageTk.PhotoImage(Image.open(resource_path("assets/up.png")).resize((150,150)))
@@ -609,13 +808,27 @@ if __name__== "__main__":
     )
     tuner_instruction.pack(expand=True, padx=20, pady=20, side=tk.TOP)
 
-    # Open Arduino COM port
-    port = connect_to_arduino(BAUD_RATE)
+    # Per-string meter shown in strum mode
+    meter = tk.Canvas(master=tuner_frame, width=480, height=180, bg="#1a1a1a", highlightthickness=0)
+    meter_markers = []
+    meter_values = []
+    draw_meter()
+
+    # Open Arduino COM port and start draining it in the background
+    port = open_port(args)
+    decoder = PacketDecoder(fill_value=FULL_SCALE, packed=args.packed) if args.framed else None
+    capture = None
+    if args.record:
+        capture = CaptureWriter(args.record, SAMPLE_TYPE, SAMPLING_RATE)
+        capture.start()
+    reader = SerialReader(port, r, decoder=decoder, capture=capture)
+    reader.start()
 
     canvas.draw()
 
-    # Schedule the first update
-    root.after(1, animate)
+    # Pace the updates from the Tk event loop
+    scheduler = FrameScheduler(root, animate, FPS, IDLE_FPS)
+    scheduler.start()
 
     # Run the Tkinter event loop
     root.mainloop()
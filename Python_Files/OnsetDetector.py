@@ -0,0 +1,269 @@
+"""
+Pluck onset detection and note segmentation
+
+`OnsetDetector` finds plucks in the incoming samples from the rise in
+spectral flux, and `NoteSegmenter` uses them to measure each note once its
+attack has passed, publishing one `NoteEvent` per note.
+
+"""
+from collections import namedtuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft
+from Tunings import closest_note
+
+
+NoteEvent = namedtuple("NoteEvent", ["onset", "frequency", "note", "cents", "decay"])
+NoteEvent.__doc__ = """
+A measured note: onset time in seconds of stream time, settled fundamental
+in Hz, closest note in the tuning and its error in cents, and seconds from
+the onset until the note decayed.
+"""
+
+
+class OnsetDetector:
+    def __init__(self, sampling_rate, frame_size=1024, hop_size=512, full_scale=128,
+                 sensitivity=3.0, history=0.5, silence=-50, min_interval=0.1):
+        """
+        Spectral flux onset detector for a `SampleRing`.
+
+        Every hop, the log-compressed magnitude spectrum of the newest frame
+        is compared with the previous one and the increases are summed. An
+        onset is reported where this flux exceeds *sensitivity* times its
+        average over the last *history* seconds, the frame is louder than
+        *silence* and no onset was reported in the last *min_interval*
+        seconds. All hops which became due since the last call are
+        transformed together.
+
+        Parameters
+        ----------
+        sampling_rate : float
+            Sample rate in Hz.
+
+        frame_size, hop_size : int
+            FFT length and spacing of the frames in samples.
+
+        full_scale : float
+            Sample amplitude which normalises to 1, 128 for 8-bit samples.
+
+        sensitivity : float
+            Ratio of flux to its recent average needed for an onset.
+
+        history : float
+            Seconds of flux averaged for the adaptive threshold.
+
+        silence : float
+            Frame level in dB below which no onset is reported.
+
+        min_interval : float
+            Shortest time in seconds between onsets.
+        """
+        self.sampling_rate = sampling_rate
+        self.frame_size = frame_size
+        self.hop_size = hop_size
+        self.full_scale = full_scale
+        self.sensitivity = sensitivity
+        self.silence = silence
+        self.min_interval = int(min_interval*sampling_rate)
+        self._window = np.hanning(frame_size) / full_scale
+        self._history = np.zeros(max(1, int(history*sampling_rate/hop_size)))
+        self._slot = 0
+        # Slots of the history holding flux so far
+        self._filled = 0
+        self._previous = None
+        self._next_end = frame_size
+        self._last_onset = -self.min_interval
+
+        # Sample numbers one past the end, and levels in dB, of the frames
+        # processed by the last call to `update`
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.levels = np.zeros(0)
+
+    def update(self, ring, index=None):
+        """
+        Process the frames which have become due.
+
+        Parameters
+        ----------
+        ring : SampleRing
+            Ring holding the raw samples.
+
+        index : int
+            Sample number to treat as the newest. Defaults to ``ring.index``.
+
+        Returns
+        -------
+        onsets : list[int]
+            Sample numbers of the onsets found, in order.
+        """
+        index = ring.index if index is None else index
+        if index < self._next_end:
+            self.ends = self.ends[:0]
+            self.levels = self.levels[:0]
+            return []
+
+        # Frames still held in the ring, oldest first
+        last_end = self._next_end + (index - self._next_end)//self.hop_size*self.hop_size
+        first_end = max(self._next_end, last_end - (ring.capacity - self.frame_size)//self.hop_size*self.hop_size)
+        samples = ring.latest(last_end - first_end + self.frame_size, last_end)
+        frames = sliding_window_view(samples, self.frame_size)[::self.hop_size]
+        self._next_end = last_end + self.hop_size
+
+        x = frames - frames.mean(axis=1, keepdims=True)
+        self.levels = 10*np.log10(np.mean(x*x, axis=1) / self.full_scale**2 + 1e-20)
+        self.ends = first_end + self.hop_size*np.arange(len(frames))
+        magnitude = np.log1p(np.abs(rfft(x*self._window, axis=1)))
+
+        # Half-wave rectified increase over the previous frame
+        previous = magnitude[:1] if self._previous is None else self._previous[None, :]
+        flux = np.maximum(np.diff(magnitude, axis=0, prepend=previous), 0).sum(axis=1)
+        if self._previous is None:
+            # The very first frame has nothing to rise from
+            flux[0] = np.nan
+        self._previous = magnitude[-1]
+
+        onsets = []
+        for end, value, level in zip(self.ends, flux, self.levels):
+            # Only the slots filled so far, so the threshold is not near zero
+            # until the history is full
+            average = self._history[:self._filled].mean() if self._filled else np.inf
+            if (value > self.sensitivity*average and level > self.silence
+                    and end - self._last_onset >= self.min_interval):
+                onsets.append(int(end))
+                self._last_onset = end
+            if np.isnan(value):
+                continue
+            self._history[self._slot] = value
+            self._slot = (self._slot + 1) % len(self._history)
+            self._filled = min(self._filled + 1, len(self._history))
+        return onsets
+
+
+class NoteSegmenter:
+    def __init__(self, onsets, detector, tuning, attack=0.08, decay_db=20, max_measurements=8,
+                 min_confidence=0.5):
+        """
+        Measure each plucked note during its sustain and publish it as a
+        `NoteEvent` once it has decayed.
+
+        After an onset the first *attack* seconds are skipped, then the pitch
+        detector is run on windows starting there and spaced one onset hop
+        apart, up to *max_measurements* of them. The settled pitch is the
+        median of the confident ones. The note ends when its level
+        falls *decay_db* below its peak, drops to silence or the next onset
+        arrives. The detector only runs while a note is being measured.
+
+        Parameters
+        ----------
+        onsets : OnsetDetector
+            Supplies the onsets and the level of every hop.
+
+        detector : PitchDetector
+            Estimates the pitch of each measurement window.
+
+        tuning : dict or NoteIndex
+            Note names and frequencies in Hz, see `Tunings`.
+
+        attack : float
+            Seconds skipped after each onset.
+
+        decay_db : float
+            Fall from the peak level in dB which ends a note.
+
+        max_measurements : int
+            Detector runs per note.
+
+        min_confidence : float
+            Confidence needed for a measurement to count.
+        """
+        self.onsets = onsets
+        self.detector = detector
+        self.tuning = tuning
+        self.attack = int(attack*onsets.sampling_rate)
+        self.decay_db = decay_db
+        self.max_measurements = max_measurements
+        self.min_confidence = min_confidence
+
+        # Onset sample number of the sounding note, None between notes
+        self.onset = None
+        self._peak = None
+        self._measurements = []
+        self._attempts = 0
+        self._next_measure = None
+
+    @property
+    def active(self):
+        """True while a note is sounding."""
+        return self.onset is not None
+
+    @property
+    def measuring(self):
+        """True while the sounding note still needs pitch measurements."""
+        return self.active and self._attempts < self.max_measurements
+
+    @property
+    def pitch(self):
+        """Settled pitch of the sounding note so far in Hz, or None."""
+        return float(np.median(self._measurements)) if self._measurements else None
+
+    def _finish(self, end):
+        """
+        End the sounding note at *end*, returning its `NoteEvent`, or None if
+        it was not measured.
+        """
+        rate = self.onsets.sampling_rate
+        frequency = self.pitch
+        event = None
+        if frequency is not None:
+            note, _, _, cents = closest_note(frequency, self.tuning)
+            event = NoteEvent(self.onset/rate, frequency, note, cents, (end - self.onset)/rate)
+        self.onset = None
+        self._measurements = []
+        self._attempts = 0
+        return event
+
+    def _measure(self, ring, index):
+        """Run the detector on every measurement window that is now complete."""
+        window = self.detector.window_size
+        while self.measuring and self._next_measure + window <= index:
+            end = self._next_measure + window
+            if index - end + window > ring.capacity:
+                # Overwritten already, skip ahead
+                self._next_measure += self.onsets.hop_size
+                continue
+            frequency, confidence = self.detector.detect(ring.latest(window, end))
+            if confidence >= self.min_confidence:
+                self._measurements.append(frequency)
+            self._attempts += 1
+            self._next_measure += self.onsets.hop_size
+
+    def update(self, ring, index=None):
+        """
+        Follow the notes in any new samples.
+
+        Returns
+        -------
+        events : list[NoteEvent]
+            Notes which finished during this call.
+        """
+        index = ring.index if index is None else index
+        events = []
+        onsets = set(self.onsets.update(ring, index))
+
+        for end, level in zip(self.onsets.ends, self.onsets.levels):
+            if end in onsets:
+                if self.active:
+                    self._measure(ring, end)
+                    events.append(self._finish(end))
+                self.onset = int(end) - self.onsets.hop_size
+                self._peak = level
+                self._next_measure = self.onset + self.attack
+            elif self.active:
+                self._peak = max(self._peak, level)
+                if level < self._peak - self.decay_db or level < self.onsets.silence:
+                    self._measure(ring, end)
+                    events.append(self._finish(end))
+
+        if self.active:
+            self._measure(ring, index)
+        return [event for event in events if event is not None]
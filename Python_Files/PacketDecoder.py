@@ -0,0 +1,180 @@
+import numpy as np
+
+
+SYNC = (0xA5, 0x5A)
+HEADER_SIZE = 5 # sync word, 16-bit sequence number, flags
+FLAG_DISTORTION = 0x01
+
+# Low two bits of each sample in a packed group, indexed by the fifth byte
+_LOW_BITS = ((np.arange(256)[:, None] >> (2*np.arange(4))) & 3).astype(np.uint16)
+
+
+def unpack10(packed, out=None):
+    """
+    Unpack 10-bit samples sent as 4 samples in every 5 bytes.
+
+    Bytes 0-3 of each group hold the top 8 bits of samples 0-3 and byte 4
+    holds their low 2 bits, sample 0 in the least significant pair.
+
+    Parameters
+    ----------
+    packed : bytes or ndarray
+        Whole groups of 5 bytes.
+
+    out : ndarray
+        Optional uint16 array of 4 samples per group to write into, e.g. a
+        `SampleRing.reserve` slot.
+    """
+    groups = np.frombuffer(packed, dtype=np.uint8).reshape(-1, 5)
+    if out is None:
+        out = np.empty(4*len(groups), dtype=np.uint16)
+    samples = out.reshape(-1, 4)
+    np.left_shift(groups[:, :4], 2, out=samples, dtype=np.uint16)
+    samples |= _LOW_BITS[groups[:, 4]]
+    return out
+
+
+class PacketDecoder:
+    def __init__(self, payload_size=64, fill_value=128, max_gap=64, packed=False):
+        """
+        Decoder for the framed serial protocol of `tuner_firmware.ino`.
+
+        Each packet is laid out as::
+
+            0xA5 0x5A | seq (uint16 LE) | flags | payload | checksum
+
+        where the checksum makes the byte sum from *seq* to the checksum
+        itself zero modulo 256. Every candidate packet in a block is
+        validated at once with NumPy, and samples lost with dropped packets
+        are replaced by *fill_value* and flagged in the returned mask.
+
+        With *packed* the payload carries 10-bit samples packed 4 to every 5
+        bytes, see `unpack10`, and `decode` returns the packed bytes so they
+        can be unpacked straight into the sample ring.
+
+        Parameters
+        ----------
+        payload_size : int
+            Samples per packet, must match the firmware's PAYLOAD_SIZE.
+
+        fill_value : int
+            Sample value written in place of lost samples, mid-scale by
+            default so gaps read as silence. Use 512 for packed 10-bit
+            samples.
+
+        max_gap : int
+            Largest number of lost packets filled in. Longer gaps are
+            treated as a restart of the stream and not filled.
+
+        packed : bool
+            Payload holds packed 10-bit samples, must match the firmware's
+            PACKED setting.
+        """
+        self.payload_size = payload_size
+        self.packed = packed
+        if packed:
+            if payload_size % 4:
+                raise ValueError("Packed payloads must hold a multiple of 4 samples")
+            payload_bytes = payload_size*5//4
+            # Packed bytes for 4 samples of fill_value
+            fill = np.array([fill_value >> 2]*4 + [sum((fill_value & 3) << 2*k for k in range(4))], dtype=np.uint8)
+            self._fill = np.tile(fill, payload_size//4)
+        else:
+            payload_bytes = payload_size
+            self._fill = np.full(payload_size, fill_value, dtype=np.uint8)
+        self.packet_size = HEADER_SIZE + payload_bytes + 1
+        self.fill_value = fill_value
+        self.max_gap = max_gap
+        self._tail = np.zeros(0, dtype=np.uint8)
+        self._offsets = np.arange(2, self.packet_size)
+        self._payload = np.arange(HEADER_SIZE, HEADER_SIZE + payload_bytes)
+        self._last_seq = None
+
+        # Loss statistics
+        self.packets_received = 0
+        self.packets_lost = 0
+        self.checksum_errors = 0
+        self.bytes_skipped = 0
+        self.flags = 0
+
+    @property
+    def loss_rate(self):
+        """Fraction of packets lost since the decoder was created."""
+        total = self.packets_received + self.packets_lost
+        return self.packets_lost / total if total else 0.0
+
+    def _select(self, starts):
+        """Drop packets overlapping an earlier accepted packet."""
+        if np.all(np.diff(starts) >= self.packet_size):
+            return starts
+        keep = []
+        end = -1
+        for start in starts:
+            if start >= end:
+                keep.append(start)
+                end = start + self.packet_size
+        return np.array(keep, dtype=starts.dtype)
+
+    def decode(self, data):
+        """
+        Decode a block of received bytes.
+
+        Bytes belonging to a packet which is not complete yet are kept and
+        decoded with the next block.
+
+        Returns
+        -------
+        samples : ndarray
+            Decoded uint8 samples in order, lost packets filled in. Packed
+            bytes for `unpack10` when *packed* is set.
+
+        missing : ndarray
+            Boolean mask, True where a sample was filled in.
+        """
+        buf = np.concatenate((self._tail, np.frombuffer(data, dtype=np.uint8)))
+        n_complete = len(buf) - self.packet_size + 1
+        if n_complete <= 0:
+            self._tail = buf
+            return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=bool)
+
+        # Every complete candidate packet, validated in bulk
+        starts = np.flatnonzero((buf[:n_complete] == SYNC[0]) & (buf[1:n_complete + 1] == SYNC[1]))
+        packets = buf[starts[:, None] + self._offsets]
+        valid = packets.sum(axis=1, dtype=np.uint32) % 256 == 0
+        good = self._select(starts[valid])
+
+        # Sync words that failed the check and are not inside a good packet
+        bad = starts[~valid]
+        if len(good) and len(bad):
+            inside = np.searchsorted(good, bad, side="right") - 1
+            bad = bad[(inside < 0) | (bad >= good[np.maximum(inside, 0)] + self.packet_size)]
+        self.checksum_errors += len(bad)
+
+        consumed = n_complete
+        if len(good):
+            consumed = max(consumed, good[-1] + self.packet_size)
+        self.bytes_skipped += consumed - len(good)*self.packet_size
+        self._tail = buf[consumed:].copy()
+
+        if len(good) == 0:
+            return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=bool)
+
+        seq = buf[good + 2].astype(np.int64) | (buf[good + 3].astype(np.int64) << 8)
+        self.flags = int(buf[good[-1] + 4])
+        payloads = buf[good[:, None] + self._payload]
+        self.packets_received += len(good)
+
+        # Output row of each packet, leaving room for lost packets
+        prev = np.concatenate(([seq[0] - 1 if self._last_seq is None else self._last_seq], seq[:-1]))
+        step = (seq - prev) % 65536
+        step[(step == 0) | (step > self.max_gap + 1)] = 1 # duplicate or restart
+        self.packets_lost += int((step - 1).sum())
+        self._last_seq = int(seq[-1])
+        rows = np.cumsum(step) - 1
+
+        samples = np.empty((rows[-1] + 1, len(self._fill)), dtype=np.uint8)
+        samples[:] = self._fill
+        samples[rows] = payloads
+        missing = np.ones((len(samples), self.payload_size), dtype=bool)
+        missing[rows] = False
+        return samples.ravel(), missing.ravel()
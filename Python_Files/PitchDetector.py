@@ -0,0 +1,322 @@
+import numpy as np
+from scipy.fft import rfft, irfft, next_fast_len
+from ZoomSpectrum import ZoomSpectrum
+
+
+class PitchDetector:
+    def __init__(self, sampling_rate, f_min=30, f_max=1000, window_size=2048, full_scale=128, silence=-50):
+        """
+        Common interface of the pitch detectors.
+
+        `detect` takes the newest *window_size* raw samples and returns the
+        estimated fundamental with a confidence between 0 and 1. Signals
+        quieter than *silence* dB relative to full scale get confidence 0.
+
+        Parameters
+        ----------
+        sampling_rate : float
+            Sample rate in Hz.
+
+        f_min, f_max : float
+            Range of fundamentals searched in Hz.
+
+        window_size : int
+            Samples analysed per estimate.
+
+        full_scale : float
+            Sample amplitude which normalises to 1, 128 for 8-bit samples.
+
+        silence : float
+            Level in dB below which no pitch is reported.
+        """
+        self.sampling_rate = sampling_rate
+        self.f_min = f_min
+        self.f_max = f_max
+        self.window_size = window_size
+        self.full_scale = full_scale
+        self.silence = silence
+        # Lag range in samples
+        self.min_lag = max(2, int(sampling_rate / f_max))
+        self.max_lag = int(np.ceil(sampling_rate / f_min))
+
+    def _normalise(self, samples):
+        """Remove the DC offset, scale and measure the level in dB."""
+        x = (samples - np.average(samples)) / self.full_scale
+        level = 10*np.log10(np.mean(x*x) + 1e-20)
+        return x, level
+
+    def detect(self, samples):
+        """
+        Estimate the fundamental of the newest samples.
+
+        Returns
+        -------
+        frequency : float
+            Estimated fundamental in Hz.
+
+        confidence : float
+            Between 0 (no pitch) and 1 (perfectly periodic).
+        """
+        raise NotImplementedError
+
+
+class FFTDetector(PitchDetector):
+    def __init__(self, analyzer, threshold, window_size=8192):
+        """
+        The original method: first peak of the band-limited PSD over
+        *threshold* dB, see `SpectrumAnalyzer.find_peak`.
+
+        Confidence is 1 when a peak clears the threshold and 0 otherwise.
+        """
+        super().__init__(analyzer.sampling_rate, analyzer.f_min, analyzer.f_max,
+                         window_size, analyzer.full_scale)
+        self.analyzer = analyzer
+        self.threshold = threshold
+
+    def detect_psd(self, psd, frequencies):
+        """Estimate from a PSD which has already been computed."""
+        peak_freq, peak = self.analyzer.find_peak(psd, frequencies, self.threshold)
+        return peak_freq, 1.0 if peak > self.threshold else 0.0
+
+    def detect(self, samples):
+        psd = self.analyzer.psd(samples[-self.window_size:])
+        return self.detect_psd(psd, self.analyzer.frequencies(self.window_size))
+
+
+def _interpolate(y, i):
+    """Offset of the extremum of a parabola through y[i-1], y[i], y[i+1]."""
+    if i == 0 or i == len(y) - 1:
+        return 0.0
+    a, b, c = y[i - 1:i + 2]
+    denominator = a - 2*b + c
+    return 0.5*(a - c)/denominator if denominator else 0.0
+
+
+class YinDetector(PitchDetector):
+    def __init__(self, sampling_rate, f_min=30, f_max=1000, window_size=2048, full_scale=128,
+                 silence=-50, threshold=0.15):
+        """
+        YIN estimator (de Cheveigne & Kawahara, 2002).
+
+        The difference function for every lag is computed at once from an
+        FFT cross-correlation and running sums of energy. The first dip of
+        the cumulative mean normalised difference below *threshold* is
+        taken, which avoids octave-up errors, and the confidence is one minus
+        its depth.
+
+        *window_size* must exceed the longest lag, ``sampling_rate/f_min``.
+        """
+        super().__init__(sampling_rate, f_min, f_max, window_size, full_scale, silence)
+        self.threshold = threshold
+        # Integration window, the rest of the frame supplies the lags
+        self.integration = window_size - self.max_lag
+        if self.integration <= 0:
+            raise ValueError("window_size must be longer than sampling_rate/f_min")
+        self._n_fft = next_fast_len(window_size + self.integration)
+        self._lags = np.arange(1, self.max_lag + 1)
+
+    def detect(self, samples):
+        x, level = self._normalise(samples[-self.window_size:])
+        w = self.integration
+
+        # d(t) = sum x[j]^2 + sum x[j+t]^2 - 2 sum x[j] x[j+t], j < w
+        r = irfft(rfft(x, self._n_fft) * np.conj(rfft(x[:w], self._n_fft)), self._n_fft)[:self.max_lag + 1]
+        energy = np.concatenate(([0.0], np.cumsum(x*x)))
+        shifted = energy[self._lags + w] - energy[self._lags]
+        d = energy[w] + shifted - 2*r[1:]
+
+        # Cumulative mean normalised difference, index 0 is lag 1
+        cmnd = d * self._lags / np.maximum(np.cumsum(d), 1e-20)
+
+        search = cmnd[self.min_lag - 1:]
+        below = np.flatnonzero(search < self.threshold)
+        if below.size:
+            # Walk down to the bottom of the first dip
+            i = below[0]
+            while i + 1 < len(search) and search[i + 1] < search[i]:
+                i += 1
+        else:
+            i = np.argmin(search)
+        i += self.min_lag - 1
+        lag = i + 1 + _interpolate(cmnd, i)
+
+        confidence = float(np.clip(1 - cmnd[i], 0, 1))
+        if level < self.silence:
+            confidence = 0.0
+        return self.sampling_rate / lag, confidence
+
+
+class McLeodDetector(PitchDetector):
+    def __init__(self, sampling_rate, f_min=30, f_max=1000, window_size=2048, full_scale=128,
+                 silence=-50, cutoff=0.9):
+        """
+        McLeod Pitch Method (McLeod & Wyvill, 2005).
+
+        The normalised square difference function for every lag is computed
+        at once from an FFT autocorrelation. The first key maximum within
+        *cutoff* of the highest one is taken, and the confidence is its
+        height.
+
+        *window_size* should be at least twice ``sampling_rate/f_min``.
+        """
+        super().__init__(sampling_rate, f_min, f_max, window_size, full_scale, silence)
+        self.cutoff = cutoff
+        self.max_lag = min(self.max_lag, window_size - 1)
+        self._n_fft = next_fast_len(2*window_size)
+        self._lags = np.arange(self.max_lag + 1)
+
+    def detect(self, samples):
+        x, level = self._normalise(samples[-self.window_size:])
+        n = len(x)
+
+        # nsdf(t) = 2 r(t) / m(t), both over the overlapping part j < n - t
+        spectrum = rfft(x, self._n_fft)
+        r = irfft(spectrum * np.conj(spectrum), self._n_fft)[:self.max_lag + 1]
+        energy = np.concatenate(([0.0], np.cumsum(x*x)))
+        m = energy[n - self._lags] + (energy[n] - energy[self._lags])
+        nsdf = 2*r / np.maximum(m, 1e-20)
+
+        # Key maxima: the highest point between each positive-going zero
+        # crossing and the next negative-going one
+        positive = nsdf > 0
+        starts = np.flatnonzero(~positive[:-1] & positive[1:]) + 1
+        ends = np.flatnonzero(positive[:-1] & ~positive[1:]) + 1
+        if positive[-1]:
+            ends = np.append(ends, len(nsdf))
+        ends = ends[np.searchsorted(ends, starts[0]):] if starts.size else ends[:0]
+        starts = starts[:len(ends)]
+        keep = ends > self.min_lag
+        starts, ends = starts[keep], ends[keep]
+        if starts.size == 0:
+            return 0.0, 0.0
+        peaks = np.array([s + np.argmax(nsdf[s:e]) for s, e in zip(starts, ends)])
+        peaks = peaks[peaks >= self.min_lag]
+        if peaks.size == 0:
+            return 0.0, 0.0
+
+        i = peaks[np.argmax(nsdf[peaks] >= self.cutoff * nsdf[peaks].max())]
+        lag = i + _interpolate(nsdf, i)
+        confidence = float(np.clip(nsdf[i], 0, 1))
+        if level < self.silence:
+            confidence = 0.0
+        return self.sampling_rate / lag, confidence
+
+
+class HarmonicDetector(FFTDetector):
+    def __init__(self, analyzer, threshold, window_size=8192, method="product", n_harmonics=3):
+        """
+        Harmonic product spectrum or harmonic sum estimator on the
+        band-limited PSD, robust to a fundamental weaker than its overtones.
+
+        Every candidate f0 up to ``f_max`` is scored from those of its first
+        *n_harmonics* harmonics which fall inside the band, in one gather
+        through index maps built once per FFT length: the mean of their
+        levels in dB (the log of the harmonic product) or the mean of their
+        linear power. Averaging over the harmonics in the band keeps a
+        candidate with only one or two of them on equal terms with one an
+        octave below. Each harmonic takes the largest bin within half a bin
+        per harmonic number of its nominal position, so harmonics falling
+        between bins still line up.
+
+        The confidence is a harmonicity score, the fraction of the band's
+        power within two bins of a harmonic of the chosen f0, or 0 when no
+        bin clears *threshold* dB.
+
+        Parameters
+        ----------
+        method : str
+            ``"product"`` or ``"sum"``.
+
+        n_harmonics : int
+            Harmonics combined per candidate.
+        """
+        super().__init__(analyzer, threshold, window_size)
+        if method not in ("product", "sum"):
+            raise ValueError(f"Unknown method {method!r}, expected 'product' or 'sum'")
+        self.method = method
+        self.n_harmonics = n_harmonics
+        self._maps = {}
+
+    def _map(self, frequencies):
+        """Index map of every candidate's harmonics into the band PSD."""
+        key = (len(frequencies), frequencies[0])
+        if key not in self._maps:
+            bin_width = frequencies[1] - frequencies[0]
+            lo = int(round(frequencies[0] / bin_width))
+            last = lo + len(frequencies) - 1
+            candidates = np.arange(lo, last + 1)
+            h = np.arange(1, self.n_harmonics + 1)
+            # Harmonics of each candidate inside the band
+            inside = h[:, None]*candidates[None, :] <= last
+            spread = np.arange(-(self.n_harmonics // 2), self.n_harmonics // 2 + 1)
+            # (harmonic, candidate, neighbour) absolute bins
+            bins = h[:, None, None]*candidates[None, :, None] + spread[None, None, :]
+            # Only search half a bin per harmonic number either side
+            allowed = np.abs(spread)[None, None, :] <= (h[:, None, None] // 2)
+            bins = np.where(allowed, bins, h[:, None, None]*candidates[None, :, None])
+            self._maps[key] = (np.clip(bins, lo, last) - lo, inside, inside.sum(axis=0), lo, bin_width)
+        return self._maps[key]
+
+    def detect_psd(self, psd, frequencies):
+        index_map, inside, counts, lo, bin_width = self._map(frequencies)
+        if index_map.shape[1] == 0 or psd.max() <= self.threshold:
+            return frequencies[np.argmax(psd)], 0.0
+
+        if self.method == "product":
+            # Sum of dB is the log of the product of powers
+            harmonics = psd[index_map].max(axis=2)
+        else:
+            power = 10**(psd/10)
+            harmonics = power[index_map].max(axis=2)
+        harmonics = np.where(inside, harmonics, -np.inf)
+        score = np.where(inside, harmonics, 0).sum(axis=0) / counts
+        candidate = np.argmax(score)
+
+        # Refine f0 from the strongest of its harmonics
+        h = np.argmax(harmonics[:, candidate])
+        peak = index_map[h, candidate, np.argmax(psd[index_map[h, candidate]])]
+        f0 = (frequencies[peak] + self.analyzer.interpolate(psd, peak)*bin_width) / (h + 1)
+
+        # Harmonicity: share of the band's power near harmonics of f0
+        power = 10**(psd/10)
+        centres = np.round(f0*np.arange(1, int(frequencies[-1]/f0) + 1)/bin_width).astype(int) - lo
+        near = np.clip(centres[:, None] + np.arange(-2, 3), 0, len(psd) - 1)
+        near = np.unique(near)
+        harmonicity = power[near].sum() / power.sum()
+        return f0, float(harmonicity)
+
+
+class ZoomDetector(PitchDetector):
+    def __init__(self, analyzer, threshold, window_size=4096, coarse_size=2048, points=64):
+        """
+        Coarse-to-fine estimator, see `ZoomSpectrum`.
+
+        The first peak over the threshold in a short coarse FFT is the
+        candidate, and the strongest frequency of a zoomed spectrum around
+        it, refined with a parabola through the log power, is the estimate.
+        This reaches the accuracy of a long FFT from a shorter window.
+
+        *threshold* is in dB for *window_size* samples. The coarse search
+        lowers it to keep the same sensitivity to a steady tone, whose level
+        falls 3 dB for each halving of the FFT length.
+
+        Confidence is 1 when the candidate clears the threshold and 0
+        otherwise.
+        """
+        super().__init__(analyzer.sampling_rate, analyzer.f_min, analyzer.f_max,
+                         window_size, analyzer.full_scale)
+        self.analyzer = analyzer
+        self.threshold = threshold
+        self.zoom = ZoomSpectrum(analyzer, window_size, coarse_size, points)
+        self._coarse_threshold = threshold + 10*np.log10(coarse_size / window_size)
+
+    def detect(self, samples):
+        zoom = self.zoom
+        psd = zoom.coarse(samples)
+        candidate, peak = self.analyzer.find_peak(psd, zoom.coarse_frequencies, self._coarse_threshold)
+        index = np.argmin(np.abs(zoom.coarse_frequencies - candidate))
+
+        frequencies, zoomed = zoom.zoom(samples, index)
+        i = np.argmax(zoomed)
+        frequency = frequencies[i] + _interpolate(zoomed, i)*(frequencies[1] - frequencies[0])
+        return frequency, 1.0 if peak > self._coarse_threshold else 0.0
@@ -0,0 +1,148 @@
+from collections import deque
+import numpy as np
+from Tunings import note_index
+
+
+class PitchTracker:
+    def __init__(self, tuning, min_confidence=0.5, median_length=3, process_noise=0.05,
+                 measurement_noise=0.3, jump=50, in_tune=1.0, hysteresis=0.5, release=5):
+        """
+        Smooth pitch estimates on their way to the display and report only
+        what visibly changes.
+
+        Confident estimates go through a running median, which rejects
+        single-frame octave errors, and then a Kalman filter with a random
+        walk model whose measurement noise grows as the confidence falls. A
+        jump of more than *jump* cents restarts both, so a new note is
+        followed at once. The in tune, flat and sharp states switch with
+        hysteresis, and the display is only cleared after *release*
+        unconfident estimates in a row.
+
+        `update` returns just the displayed values which changed, rounded as
+        they are shown, so nothing is redrawn for jitter below the display
+        resolution.
+
+        Parameters
+        ----------
+        tuning : dict or NoteIndex
+            Notes to tune to, see `Tunings`.
+
+        min_confidence : float
+            Confidence needed for an estimate to be used.
+
+        median_length : int
+            Estimates in the running median.
+
+        process_noise, measurement_noise : float
+            Standard deviations in Hz of the pitch drift per estimate and of
+            a fully confident estimate.
+
+        jump : float
+            Change in cents treated as a new note.
+
+        in_tune : float
+            Error in Hz within which a note becomes in tune.
+
+        hysteresis : float
+            Extra error in Hz before an in tune note becomes flat or sharp.
+
+        release : int
+            Unconfident estimates in a row before the display is cleared.
+        """
+        self.min_confidence = min_confidence
+        self.jump = jump
+        self.in_tune = in_tune
+        self.hysteresis = hysteresis
+        self.release = release
+        self._q = process_noise**2
+        self._r = measurement_noise**2
+        self._recent = deque(maxlen=median_length)
+        self.set_tuning(tuning)
+
+    def set_tuning(self, tuning):
+        """Tune to another tuning, starting afresh, see `reset`."""
+        self.tuning = note_index(tuning)
+        return self.reset()
+
+    def reset(self):
+        """
+        Forget the tracked pitch and clear the display.
+
+        Returns
+        -------
+        changes : dict
+            The displayed fields which were showing a value, now None, as
+            returned by `update`.
+        """
+        shown = getattr(self, "displayed", {})
+        changes = {key: None for key, value in shown.items() if value is not None}
+        self._recent.clear()
+        self._x = None
+        self._p = None
+        self._misses = 0
+        # Smoothed frequency and closest note frequency in Hz, None when
+        # nothing is tracked
+        self.frequency = None
+        self.note_freq = None
+        self.displayed = {"state": None, "note": None, "note_freq": None,
+                          "error": None, "error_c": None, "frequency": None}
+        return changes
+
+    def _filter(self, frequency, confidence):
+        """Median and Kalman filter one confident estimate."""
+        self._recent.append(frequency)
+        z = float(np.median(self._recent))
+        if self._x is None or abs(1200*np.log2(z/self._x)) > self.jump:
+            self._recent.clear()
+            self._recent.append(frequency)
+            self._x, self._p = frequency, self._r
+            return self._x
+        self._p += self._q
+        gain = self._p / (self._p + self._r/confidence)
+        self._x += gain*(z - self._x)
+        self._p *= 1 - gain
+        return self._x
+
+    def _state(self, error):
+        """In tune, flat or sharp, with hysteresis around in tune."""
+        limit = self.in_tune + self.hysteresis if self.displayed["state"] == "in tune" else self.in_tune
+        if abs(error) < limit:
+            return "in tune"
+        return "flat" if error < 0 else "sharp"
+
+    def update(self, frequency, confidence):
+        """
+        Add the latest estimate.
+
+        Returns
+        -------
+        changes : dict
+            New values of the displayed fields which changed: ``state``
+            (``"in tune"``, ``"flat"``, ``"sharp"`` or None), ``note``,
+            ``note_freq``, ``error`` in Hz, ``error_c`` in cents and
+            ``frequency``, each None when no pitch is shown.
+        """
+        if confidence < self.min_confidence or frequency <= 30:
+            self._misses += 1
+            if self._misses < self.release or self._x is None:
+                return {}
+            shown = dict.fromkeys(self.displayed)
+            self._recent.clear()
+            self._x = None
+            self.frequency = self.note_freq = None
+        else:
+            self._misses = 0
+            self.frequency = self._filter(frequency, confidence)
+            note, self.note_freq, error, error_c = self.tuning.closest(self.frequency)
+            shown = {
+                "state": self._state(error),
+                "note": note,
+                "note_freq": round(self.note_freq, 1),
+                "error": round(error, 1),
+                "error_c": round(error_c, 1),
+                "frequency": round(self.frequency, 1),
+            }
+
+        changes = {key: value for key, value in shown.items() if value != self.displayed[key]}
+        self.displayed = shown
+        return changes
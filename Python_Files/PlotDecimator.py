@@ -0,0 +1,95 @@
+import numpy as np
+
+
+# How the points in one pixel column are combined
+MODES = ["minmax", "max"]
+
+
+class PlotDecimator:
+    def __init__(self, line, x, mode="minmax"):
+        """
+        Feed a line only the points its axes can show at their current size.
+
+        The points inside the x limits are grouped by the pixel column they
+        fall in, using the axes' own transform so log axes work too, and
+        each column is drawn as the minimum and maximum of its points. This
+        keeps every peak of the trace while drawing at most two points per
+        pixel. Traces with fewer points than that are only cropped to the x
+        limits. The grouping is worked out again whenever the axes change
+        size or the x limits change.
+
+        For spectra, *mode* can instead collapse each column to its maximum,
+        at the mean frequency of its bins, so a long FFT on a log axis costs
+        one point per pixel however many bins land in the top octave.
+
+        Parameters
+        ----------
+        line : Line2D
+            The line to update, already added to its axes.
+
+        x : ndarray
+            Fixed, increasing x values of the trace.
+
+        mode : str
+            One of `MODES`:
+
+            - ``"minmax"``: the minimum and maximum of each column
+            - ``"max"``: the maximum of each column
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.line = line
+        self.ax = line.axes
+        self.x = np.asarray(x)
+        self._plan = None
+        self._bounds = None
+        self.ax.callbacks.connect("xlim_changed", self.invalidate)
+
+    def invalidate(self, *args):
+        """Rebuild the column grouping before the next update."""
+        self._plan = None
+
+    def _build(self):
+        """Visible slice, column starts and x values of the output."""
+        lo, hi = sorted(self.ax.get_xlim())
+        # One point either side so the line runs off the edge of the axes
+        i0 = max(np.searchsorted(self.x, lo) - 1, 0)
+        i1 = min(np.searchsorted(self.x, hi, side="right") + 1, len(self.x))
+        visible = slice(i0, i1)
+        x = self.x[visible]
+        pixels = self.ax.transData.transform(np.column_stack((x, np.zeros(len(x)))))[:, 0]
+        columns = np.floor(pixels - self.ax.bbox.x0).astype(np.int64)
+        starts = np.flatnonzero(np.diff(columns, prepend=columns[0] - 1)) if len(x) else columns
+        if self.mode == "minmax":
+            if 2*len(starts) >= len(x):
+                return visible, None, x, None
+            out_x = np.repeat(x[starts], 2)
+        else:
+            if len(starts) >= len(x):
+                return visible, None, x, None
+            out_x = np.add.reduceat(x, starts) / np.diff(np.append(starts, len(x)))
+        return visible, starts, out_x, np.empty(len(out_x))
+
+    def update(self, y):
+        """Set the line's data to the decimated *y*, one value per x."""
+        bounds = self.ax.bbox.bounds
+        if self._plan is None or bounds != self._bounds:
+            self._plan = self._build()
+            self._bounds = bounds
+            rebuilt = True
+        else:
+            rebuilt = False
+        visible, starts, out_x, out = self._plan
+        y = y[visible]
+        if starts is not None:
+            if self.mode == "minmax":
+                np.minimum.reduceat(y, starts, out=out[0::2])
+                np.maximum.reduceat(y, starts, out=out[1::2])
+            else:
+                np.maximum.reduceat(y, starts, out=out)
+            y = out
+        if rebuilt:
+            self.line.set_data(out_x, y)
+        else:
+            self.line.set_ydata(y)
@@ -0,0 +1,431 @@
+import tkinter as tk
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import FontProperties, findfont
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+
+
+class _Pane:
+    def __init__(self, ax, height):
+        """Pixel geometry of an axes, rows counted down from the top."""
+        x0, y0, x1, y1 = ax.bbox.extents
+        self.x0, self.x1 = int(round(x0)), int(round(x1))
+        self.y0, self.y1 = int(round(height - y1)), int(round(height - y0))
+        self.log = ax.get_xscale() == "log"
+        lo, hi = ax.get_xlim()
+        self._x = (np.log10(lo), np.log10(hi)) if self.log else (lo, hi)
+        self.ylim = ax.get_ylim()
+
+    def px(self, x):
+        """Column of data *x*, relative to the left of the axes."""
+        lo, hi = self._x
+        x = np.log10(x) if self.log else x
+        return (x - lo) / (hi - lo) * (self.x1 - self.x0)
+
+    def py(self, y):
+        """Row of data *y*, relative to the top of the axes."""
+        lo, hi = self.ylim
+        return (hi - y) / (hi - lo) * (self.y1 - self.y0)
+
+
+class _Glyphs:
+    def __init__(self, family, size):
+        """Per character masks of a font, blended into an RGBA buffer."""
+        self.font = ImageFont.truetype(findfont(FontProperties(family=family)), size)
+        self.ascent, descent = self.font.getmetrics()
+        self.height = self.ascent + descent
+        self._masks = {}
+        self._coloured = {}
+
+    def mask(self, char):
+        if char not in self._masks:
+            image = Image.new("L", (max(1, int(np.ceil(self.font.getlength(char)))), self.height))
+            ImageDraw.Draw(image).text((0, 0), char, font=self.font, fill=255)
+            self._masks[char] = np.asarray(image)
+        return self._masks[char]
+
+    def glyph(self, char, colour):
+        """RGBA glyph of *char*, zero alpha so blending keeps the buffer's."""
+        key = (char, colour)
+        if key not in self._coloured:
+            rgba = np.zeros(self.mask(char).shape + (4,), dtype=np.uint8)
+            rgba[..., :3] = self.mask(char)[..., None] * (np.array(colour[:3]) / 255)
+            self._coloured[key] = rgba
+        return self._coloured[key]
+
+    def width(self, text):
+        return sum(self.mask(c).shape[1] for c in text)
+
+    def label(self, text, colour):
+        """Whole RGBA label, for the static layer."""
+        return np.concatenate([self.glyph(c, colour) for c in text] or [np.zeros((self.height, 0, 4), np.uint8)], axis=1)
+
+
+class RasterTrace:
+    def __init__(self, line, x):
+        """
+        Line drawn by a `RasterCanvas`, fed like a `PlotDecimator`.
+
+        Every pixel column of the axes is drawn as one vertical span from
+        the lowest to the highest value the trace takes across it: the
+        points inside the column and the trace interpolated at both of its
+        edges. Wide columns keep every peak of a long trace and narrow ones
+        join up the points of a short one. The grouping of the points into
+        columns is worked out when the canvas changes size, and every frame
+        is then a few reductions and comparisons into preallocated arrays.
+        """
+        self.line = line
+        self.ax = line.axes
+        self.x = np.asarray(x)
+        self.y = None
+        self._plan = None
+
+    def update(self, y):
+        """Draw *y*, one value per x, on the next update of the canvas."""
+        self.y = y
+
+    def _build(self, pane):
+        n_columns = pane.x1 - pane.x0
+        n_rows = pane.y1 - pane.y0
+        lo, hi = sorted(self.ax.get_xlim())
+        i0 = max(np.searchsorted(self.x, lo) - 1, 0)
+        i1 = min(np.searchsorted(self.x, hi, side="right") + 1, len(self.x))
+        if n_columns <= 0 or n_rows <= 0 or i1 - i0 < 2:
+            self._plan = None
+            return
+        p = pane.px(self.x[i0:i1])
+
+        # Interpolation of the trace at every column edge
+        edges = np.arange(n_columns + 1)
+        left = np.clip(np.searchsorted(p, edges, side="right") - 1, 0, len(p) - 2)
+        t = np.clip((edges - p[left]) / (p[left + 1] - p[left]), 0, 1)
+
+        # Points, in order, grouped as each column's left edge followed by
+        # the samples inside it, then the right edge of the last column
+        columns = np.floor(p).astype(np.int64)
+        s0, s1 = np.searchsorted(columns, [0, n_columns])
+        columns = columns[s0:s1]
+        counts = np.bincount(columns, minlength=n_columns)
+        sizes = np.append(counts + 1, 1)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        rank = np.arange(len(columns)) - np.searchsorted(columns, columns)
+
+        self._plan = {
+            "visible": slice(i0, i1),
+            "left": left, "right": left + 1, "t": t,
+            "edge_at": starts, "inside": slice(s0, s1),
+            "sample_at": starts[columns] + 1 + rank,
+            "starts": starts,
+            "y": np.empty(i1 - i0),
+            "points": np.empty(starts[-1] + 1),
+            "a": np.empty(n_columns + 1), "b": np.empty(n_columns + 1),
+            "min": np.empty(n_columns + 1), "max": np.empty(n_columns + 1),
+            "lo": np.empty(n_columns), "hi": np.empty(n_columns),
+            "top": np.empty(n_columns, dtype=np.int16),
+            "bottom": np.empty(n_columns, dtype=np.int16),
+            "rows": np.arange(n_rows, dtype=np.int16)[:, None],
+            "mask": np.empty((n_rows, n_columns), dtype=bool),
+            "inner": np.empty((n_rows, n_columns), dtype=bool),
+        }
+
+    def draw(self, pixels, pane, colour, width):
+        plan = self._plan
+        if plan is None or self.y is None:
+            return
+        # Copy as float64, with NaN and infinite values, e.g. the dB of a
+        # silent spectrum, moved just off the axes
+        y = plan["y"]
+        np.copyto(y, self.y[plan["visible"]], casting="unsafe")
+        lo, hi = pane.ylim
+        np.fmax(y, lo - (hi - lo), out=y)
+        np.fmin(y, hi + (hi - lo), out=y)
+        a, b = plan["a"], plan["b"]
+        np.take(y, plan["left"], out=a)
+        np.take(y, plan["right"], out=b)
+        b -= a
+        b *= plan["t"]
+        a += b
+        points = plan["points"]
+        points[plan["edge_at"]] = a
+        points[plan["sample_at"]] = y[plan["inside"]]
+
+        # Lowest and highest value over each column and its right edge
+        np.minimum.reduceat(points, plan["starts"], out=plan["min"])
+        np.maximum.reduceat(points, plan["starts"], out=plan["max"])
+        np.minimum(plan["min"][:-1], a[1:], out=plan["lo"])
+        np.maximum(plan["max"][:-1], a[1:], out=plan["hi"])
+
+        # Rows spanned, thickened to the line width
+        n_rows = len(plan["rows"])
+        for value, rows, pad in ((plan["hi"], plan["top"], -(width//2)),
+                                 (plan["lo"], plan["bottom"], (width - 1)//2)):
+            value -= hi
+            value *= -n_rows/(hi - lo)
+            np.floor(value, out=value)
+            value += pad
+            np.clip(value, -1, n_rows, out=value)
+            np.copyto(rows, value, casting="unsafe")
+
+        mask = plan["mask"]
+        np.greater_equal(plan["rows"], plan["top"], out=mask)
+        np.less_equal(plan["rows"], plan["bottom"], out=plan["inner"])
+        mask &= plan["inner"]
+        np.copyto(pixels[pane.y0:pane.y1, pane.x0:pane.x1], colour, where=mask)
+
+
+class RasterCanvas:
+    def __init__(self, master, fig, animated_artists=(), static_artists=(), font_family="DejaVu Sans",
+                 font_size=8, background=None):
+        """
+        Draw a figure's live artists straight into an RGBA buffer shown in a
+        Tk `PhotoImage`, instead of through matplotlib.
+
+        The figure is only used as the description of the plot: its axes
+        give the layout, limits, scales, ticks and labels, and its artists
+        the traces, markers and text to draw. On a resize the figure is
+        sized to the widget and the background, grid, tick and axis labels
+        and the *static_artists* are drawn into a cached layer, which is
+        drawn again on its own when a static artist changes. Every
+        update then copies that layer into the buffer, draws the animated
+        artists over it and pastes the buffer into the image, without
+        allocating any arrays. Traces are added with `trace`, which takes
+        the place of a `PlotDecimator`.
+
+        Only what the tuner draws is supported: traces, horizontal and
+        vertical line segments, solid or dotted, and single line text in a
+        light colour on the dark background. Axes patches, spines and
+        other artists are not drawn.
+
+        Parameters
+        ----------
+        master : tk.Misc
+            Parent of the widget, see `get_tk_widget`.
+
+        fig : Figure
+            Figure holding the artists.
+
+        animated_artists : Iterable[Artist]
+            Lines and text redrawn on every update.
+
+        static_artists : Iterable[Artist]
+            Lines and text drawn into the cached layer, which is redrawn
+            when one of them changes.
+
+        font_family : str
+            Font of all the text.
+
+        font_size : float
+            Font size in points.
+
+        background : color
+            Colour of the figure, its face colour by default.
+        """
+        self.fig = fig
+        self._animated = list(animated_artists)
+        self._static = list(static_artists)
+        for a in self._animated + self._static:
+            # Keep matplotlib from redrawing the figure as they change
+            a.set_animated(True)
+        self._traces = {}
+        self._colours = {}
+        self._glyphs = _Glyphs(font_family, max(1, int(round(font_size*fig.dpi/72))))
+        self._background = self._colour(fig.get_facecolor() if background is None else background)
+        self._size = None
+        self._built = None
+        self._panes = None
+        self._layer = None
+        self._layer_stale = True
+
+        self._widget = tk.Canvas(master, highlightthickness=0, bd=0, width=1, height=1,
+                                 bg="#{:02x}{:02x}{:02x}".format(*self._background[:3]))
+        self._item = self._widget.create_image(0, 0, anchor=tk.NW)
+        self._widget.bind("<Configure>", self._resize)
+
+    def get_tk_widget(self):
+        """Tk widget showing the image."""
+        return self._widget
+
+    def trace(self, line, x):
+        """Draw *line* from the y values passed to the returned trace."""
+        trace = RasterTrace(line, x)
+        self._traces[line] = trace
+        return trace
+
+    def resize(self, width, height):
+        """
+        Draw at *width* by *height* pixels from the next update on, as the
+        widget does by itself when Tk resizes it.
+        """
+        if width > 1 and height > 1:
+            self._size = (width, height)
+
+    def _resize(self, event):
+        self.resize(event.width, event.height)
+
+    def _colour(self, colour):
+        if colour not in self._colours:
+            self._colours[colour] = np.array([round(255*c) for c in to_rgba(colour)[:3]] + [255], dtype=np.uint8)
+        return self._colours[colour]
+
+    def _build(self):
+        """Allocate the buffers and plan the traces at the current size."""
+        width, height = self._size
+        self.fig.set_size_inches(width/self.fig.dpi, height/self.fig.dpi)
+        self._buffer = np.empty((height, width, 4), dtype=np.uint8)
+        self._layer = np.empty_like(self._buffer)
+        self._image = Image.frombuffer("RGBA", (width, height), self._buffer, "raw", "RGBA", 0, 1)
+        self._photo = ImageTk.PhotoImage("RGBA", (width, height))
+        self._widget.itemconfig(self._item, image=self._photo)
+
+        self._panes = {ax: _Pane(ax, height) for ax in self.fig.axes}
+        for trace in self._traces.values():
+            trace._build(self._panes[trace.ax])
+        self._built = self._size
+        self._draw_layer()
+
+    def _draw_layer(self):
+        """Draw the background, axes and static artists into the cached layer."""
+        layer = self._layer
+        layer[...] = self._background
+        for ax, pane in self._panes.items():
+            self._draw_axes(layer, ax, pane)
+        for artist in self._static:
+            self._draw(layer, artist)
+            artist.stale = False
+        self._layer_stale = False
+
+    def _draw_axes(self, layer, ax, pane):
+        """Grid, tick labels and axis labels of *ax*."""
+        grid = self._colour(rcParams["grid.color"])
+        text = self._colour(rcParams["xtick.color"])
+        label = self._colour(rcParams["axes.labelcolor"])
+        gh = self._glyphs.height
+
+        # Grid lines where matplotlib would draw them, and on a log axis
+        # spanning under a couple of decades the minor ticks labelled too
+        x_lo, x_hi = sorted(ax.get_xlim())
+        x_grid = any(line.get_visible() for line in ax.xaxis.get_gridlines())
+        x_ticks = [x for x in ax.get_xticks() if x_lo <= x <= x_hi]
+        x_labels = x_ticks
+        if pane.log and len(x_ticks) < 3:
+            x_labels = sorted(x_ticks + [x for x in ax.xaxis.get_minorticklocs() if x_lo <= x <= x_hi])
+        for x in x_labels:
+            column = pane.x0 + int(pane.px(x))
+            if x_grid and x in x_ticks:
+                layer[pane.y0:pane.y1, min(column, pane.x1 - 1)] = grid
+            self._blit_text(layer, "{:g}".format(x), column, pane.y1 + 4, "center", "top", text)
+        y_lo, y_hi = sorted(ax.get_ylim())
+        y_grid = any(line.get_visible() for line in ax.yaxis.get_gridlines())
+        for y in ax.get_yticks():
+            if y_lo <= y <= y_hi:
+                row = pane.y0 + int(pane.py(y))
+                if y_grid:
+                    layer[min(row, pane.y1 - 1), pane.x0:pane.x1] = grid
+                self._blit_text(layer, "{:g}".format(y), pane.x0 - 4, row, "right", "center", text)
+
+        self._blit_text(layer, ax.get_xlabel(), (pane.x0 + pane.x1)//2, pane.y1 + 6 + gh, "center", "top", label)
+        ylabel = np.rot90(self._glyphs.label(ax.get_ylabel(), tuple(label)))
+        tick_width = max([self._glyphs.width("{:g}".format(y)) for y in ax.get_yticks()] or [0])
+        self._blit(layer, ylabel, pane.x0 - 6 - tick_width - ylabel.shape[1],
+                   (pane.y0 + pane.y1 - ylabel.shape[0])//2)
+
+    def _blit(self, buffer, image, x, y, clip=None):
+        """Lighten *buffer* with *image* at column *x* and row *y*."""
+        h, w = buffer.shape[:2]
+        x0, y0, x1, y1 = clip if clip is not None else (0, 0, w, h)
+        left, top = max(x, x0), max(y, y0)
+        right, bottom = min(x + image.shape[1], x1), min(y + image.shape[0], y1)
+        if right > left and bottom > top:
+            region = buffer[top:bottom, left:right]
+            np.maximum(region, image[top - y:bottom - y, left - x:right - x], out=region)
+
+    def _blit_text(self, buffer, text, x, y, ha, va, colour, clip=None):
+        """Draw single line *text* aligned like matplotlib's text at *x*, *y*."""
+        glyphs = self._glyphs
+        if ha != "left":
+            width = glyphs.width(text)
+            x -= width if ha == "right" else width//2
+        if va == "center":
+            y -= glyphs.height//2
+        elif va == "bottom":
+            y -= glyphs.height
+        elif va == "baseline":
+            y -= glyphs.ascent
+        colour = tuple(colour)
+        for char in text:
+            glyph = glyphs.glyph(char, colour)
+            self._blit(buffer, glyph, x, y, clip)
+            x += glyph.shape[1]
+
+    def _position(self, artist, pane, x, y):
+        """Buffer column and row of a point in *artist*'s coordinates."""
+        ax = artist.axes
+        transform = artist.get_transform()
+        if transform is ax.transAxes:
+            column = x*(pane.x1 - pane.x0)
+        else:
+            column = pane.px(x)
+        if transform is ax.transAxes or transform is ax.get_xaxis_transform():
+            row = (1 - y)*(pane.y1 - pane.y0)
+        else:
+            row = pane.py(y)
+        return pane.x0 + int(np.floor(column)), pane.y0 + int(np.floor(row))
+
+    def _draw(self, buffer, artist):
+        if not artist.get_visible():
+            return
+        pane = self._panes[artist.axes]
+        clip = (pane.x0, pane.y0, pane.x1, pane.y1) if artist.get_clip_on() else None
+        if artist in self._traces:
+            width = max(1, int(round(artist.get_linewidth()*self.fig.dpi/72)))
+            colour = self._colour(artist.get_color()).view(np.uint32)[0]
+            self._traces[artist].draw(buffer.view(np.uint32)[..., 0], pane, colour, width)
+        elif hasattr(artist, "get_text"):
+            x, y = artist.get_position()
+            column, row = self._position(artist, pane, x, y)
+            self._blit_text(buffer, artist.get_text(), column, row, artist.get_horizontalalignment(),
+                            artist.get_verticalalignment(), self._colour(artist.get_color()), clip)
+        else:
+            self._draw_segment(buffer, artist, pane, clip)
+
+    def _draw_segment(self, buffer, line, pane, clip):
+        """Horizontal or vertical two point line, solid or dotted."""
+        # Broadcast, so a marker moved with ``set_xdata([f])`` keeps both ends
+        xy = line.get_xydata()
+        if len(xy) != 2:
+            return
+        xs, ys = xy[:, 0], xy[:, 1]
+        if xs[0] == xs[1] and ys[0] == ys[1]:
+            return
+        if line.axes.get_xscale() == "log" and min(xs) <= 0:
+            return
+        c0, r0 = self._position(line, pane, xs[0], ys[0])
+        c1, r1 = self._position(line, pane, xs[1], ys[1])
+        x0, y0, x1, y1 = clip if clip is not None else (0, 0, buffer.shape[1], buffer.shape[0])
+        step = 3 if line.get_linestyle() == ":" else 1
+        colour = self._colour(line.get_color())
+        if r0 == r1 and y0 <= r0 < y1:
+            lo, hi = max(min(c0, c1), x0), min(max(c0, c1) + 1, x1)
+            buffer[r0, lo:hi:step] = colour
+        elif c0 == c1 and x0 <= c0 < x1:
+            lo, hi = max(min(r0, r1), y0), min(max(r0, r1) + 1, y1)
+            buffer[lo:hi:step, c0] = colour
+
+    def draw(self):
+        """Redraw everything, including the cached layer."""
+        self._layer_stale = True
+        self.update()
+
+    def update(self):
+        """Draw the animated artists over the cached layer and show them."""
+        if self._size is None:
+            return
+        if self._built != self._size:
+            self._build()
+        elif self._layer_stale or any(a.stale for a in self._static):
+            self._draw_layer()
+        np.copyto(self._buffer, self._layer)
+        for artist in self._animated:
+            self._draw(self._buffer, artist)
+        self._photo.paste(self._image)
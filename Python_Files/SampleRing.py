@@ -0,0 +1,128 @@
+import numpy as np
+
+
+class SampleRing:
+    def __init__(self, capacity, dtype=np.uint8):
+        """
+        Preallocated ring buffer of samples which hands out contiguous
+        read-only views without copying.
+
+        Every sample is stored twice, at ``i`` and ``i + capacity``, so the
+        newest ``n`` samples are always one contiguous slice of the backing
+        array. A view stays valid until another ``capacity - n`` samples have
+        been written, so size the ring with some slack above the largest view
+        a consumer needs.
+
+        Parameters
+        ----------
+        capacity : int
+            Number of samples held.
+
+        dtype : numpy dtype
+            Sample type.
+        """
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._buf = np.zeros(2*capacity, dtype=self.dtype)
+        self._view = self._buf.view()
+        self._view.flags.writeable = False
+        # Total number of samples ever written
+        self.index = 0
+
+    def __len__(self):
+        return min(self.index, self.capacity)
+
+    def reserve(self, n):
+        """
+        Get a writable slot for up to *n* new samples at the head of the ring.
+
+        The slot may be shorter than *n* when it would run past the end of
+        the buffer. Fill it and then call `commit` with the number of samples
+        actually written.
+        """
+        head = self.index % self.capacity
+        n = min(n, self.capacity - head)
+        return self._buf[head:head + n]
+
+    def commit(self, n):
+        """Publish *n* samples previously written into a `reserve` slot."""
+        head = self.index % self.capacity
+        self._buf[head + self.capacity:head + self.capacity + n] = self._buf[head:head + n]
+        self.index += n
+
+    def extend(self, samples):
+        """Append an array of samples, keeping only the newest `capacity`."""
+        samples = np.asarray(samples, dtype=self.dtype)
+        # Samples that would be overwritten within this call are skipped
+        skipped = max(0, len(samples) - self.capacity)
+        self.index += skipped
+        samples = samples[skipped:]
+        while len(samples):
+            slot = self.reserve(len(samples))
+            slot[:] = samples[:len(slot)]
+            self.commit(len(slot))
+            samples = samples[len(slot):]
+
+    def extend_from(self, n, fill):
+        """
+        Write *n* samples produced straight into the ring by a callback.
+
+        ``fill(slot, offset)`` must write samples ``offset`` to
+        ``offset + len(slot)`` of the new block into the writable *slot*.
+        """
+        offset = 0
+        while offset < n:
+            slot = self.reserve(n - offset)
+            fill(slot, offset)
+            self.commit(len(slot))
+            offset += len(slot)
+
+    def readinto(self, port, n):
+        """
+        Read up to *n* bytes from *port* straight into the ring.
+
+        Returns the number of samples written.
+        """
+        if self.dtype.itemsize != 1:
+            raise TypeError("readinto needs a single byte sample type")
+        total = 0
+        while total < n:
+            slot = self.reserve(n - total)
+            count = port.readinto(memoryview(slot).cast("B"))
+            if not count:
+                break
+            self.commit(count)
+            total += count
+            if count < len(slot):
+                break
+        return total
+
+    def latest(self, n=None, index=None):
+        """
+        Read-only view of the newest *n* samples, oldest first.
+
+        Pass the *index* read earlier to get the samples ending there even if
+        a writer thread has committed more since.
+        """
+        index = self.index if index is None else index
+        held = min(index, self.capacity)
+        n = held if n is None else max(0, min(n, held))
+        end = index % self.capacity + self.capacity
+        return self._view[end - n:end]
+
+    def since(self, index):
+        """
+        Read-only view of every sample from sample number *index* onwards.
+
+        Returns
+        -------
+        samples : ndarray
+            The new samples, at most `capacity` of them.
+
+        start : int
+            Sample number of the first sample in the view. Larger than
+            *index* when older samples have already been overwritten.
+        """
+        end = self.index
+        start = max(index, end - min(end, self.capacity))
+        return self.latest(end - start, end), start
@@ -0,0 +1,143 @@
+import threading
+import time
+import numpy as np
+from PacketDecoder import unpack10
+from SampleRing import SampleRing
+
+
+class SerialReader(threading.Thread):
+    def __init__(self, port, ring, max_read=4096, timeout=0.05, decoder=None, capture=None):
+        """
+        Background thread which owns the serial port and continuously drains
+        it into a shared sample store, so the GUI never blocks on I/O.
+
+        Parameters
+        ----------
+        port : serial.Serial
+            Open port, e.g. as returned by `connect_to_arduino`.
+
+        ring : SampleRing
+            Sample store the received bytes are read into.
+
+        max_read : int
+            Largest number of bytes taken from the port in one read.
+
+        timeout : float
+            Seconds a read waits for the first byte when the port is idle.
+
+        decoder : PacketDecoder
+            Decoder for framed firmware, None when the firmware sends raw
+            samples. Samples it fills in for lost packets are marked in
+            `gaps`.
+
+        capture : CaptureWriter
+            Optional recorder which is fed every block of new samples.
+        """
+        super().__init__(daemon=True)
+        self.port = port
+        self.port.timeout = timeout
+        self.ring = ring
+        self.max_read = max_read
+        self.decoder = decoder
+        self.capture = capture
+        self.lock = threading.Lock()
+
+        # True for every sample filled in for a lost packet, in step with
+        # the sample numbers of *ring*. None without a decoder, as raw
+        # samples cannot be checked for loss
+        self.gaps = SampleRing(ring.capacity, dtype=bool) if decoder is not None else None
+
+        # Counters
+        self.bytes_received = 0
+        self.overruns = 0
+        self.reads_per_second = 0.0
+
+        self._seen_index = 0
+        self._running = threading.Event()
+
+    def run(self):
+        """Drain the port until `stop` is called."""
+        self._running.set()
+        reads = 0
+        rate_start = time.perf_counter()
+        while self._running.is_set():
+            # Block for at most `timeout` when nothing is waiting. Only this
+            # thread writes to the ring, so the read itself needs no lock.
+            n = min(max(self.port.in_waiting, 1), self.max_read)
+            start = self.ring.index
+            if self.decoder is None:
+                count = self.ring.readinto(self.port, n)
+            else:
+                bits = self.port.read(n)
+                samples, missing = self.decoder.decode(bits)
+                # Marked first, so the marks are there for any sample a
+                # snapshot can see
+                self.gaps.extend(missing)
+                if self.decoder.packed:
+                    # Unpack 10-bit groups straight into the ring
+                    self.ring.extend_from(len(samples)//5*4, lambda slot, i:
+                        unpack10(samples[i//4*5:(i + len(slot))//4*5], out=slot))
+                else:
+                    self.ring.extend(samples)
+                count = len(bits)
+            if self.capture is not None:
+                self.capture.write(self.ring.latest(self.ring.index - start))
+            with self.lock:
+                self.bytes_received += count
+                if self.ring.index - self._seen_index > self.ring.capacity:
+                    # Samples were overwritten before anyone saw them
+                    self.overruns += 1
+                    self._seen_index = self.ring.index - self.ring.capacity
+            if count:
+                reads += 1
+
+            now = time.perf_counter()
+            if now - rate_start >= 1.0:
+                self.reads_per_second = reads / (now - rate_start)
+                reads = 0
+                rate_start = now
+
+    def snapshot(self, n=None):
+        """
+        Get the newest samples in the store without copying them.
+
+        Parameters
+        ----------
+        n : int
+            Number of samples wanted, defaults to everything held.
+
+        Returns
+        -------
+        data : ndarray
+            Read-only view of the samples, oldest first.
+
+        index : int
+            Sample number one past the newest sample in the view.
+        """
+        with self.lock:
+            index = self.ring.index
+            data = self.ring.latest(n, index)
+            self._seen_index = index
+        return data, index
+
+    def filled(self, n, index):
+        """
+        Number of samples filled in for lost packets among the *n* samples
+        before sample number *index*, e.g. as returned by `snapshot`.
+        """
+        if self.gaps is None:
+            return 0
+        return int(np.count_nonzero(self.gaps.latest(n, index)))
+
+    def write(self, data):
+        """Send data to the device on the owned port."""
+        return self.port.write(data)
+
+    def stop(self):
+        """Stop the thread, close the port and finish any capture."""
+        self._running.clear()
+        if self.is_alive():
+            self.join()
+        self.port.close()
+        if self.capture is not None:
+            self.capture.close()
@@ -0,0 +1,158 @@
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import find_peaks
+
+
+# Sub-bin peak estimators accepted by SpectrumAnalyzer
+ESTIMATORS = ["none", "parabolic", "gaussian", "jain"]
+
+
+class SpectrumAnalyzer:
+    def __init__(self, sampling_rate, f_min=30, f_max=1000, full_scale=128, workers=-1, estimator="gaussian"):
+        """
+        Real-input spectrum analysis restricted to a frequency band.
+
+        Hann windows, frequency axes and scratch buffers are built once per
+        FFT length and reused, the transform is a real FFT, and only bins
+        between *f_min* and *f_max* are turned into a PSD and searched for
+        peaks.
+
+        Parameters
+        ----------
+        sampling_rate : float
+            Sample rate in Hz.
+
+        f_min, f_max : float
+            Band of interest in Hz.
+
+        full_scale : float
+            Sample amplitude which normalises to 1 once the DC offset is
+            removed, 128 for 8-bit samples.
+
+        workers : int
+            Worker threads passed to `scipy.fft.rfft`, -1 for all cores.
+
+        estimator : str
+            How `find_peak` refines the peak between bins, one of
+            `ESTIMATORS`:
+
+            - ``"none"``: centre of the peak bin
+            - ``"parabolic"``: parabola through the linear magnitudes
+            - ``"gaussian"``: parabola through the log magnitudes, i.e. a
+              Gaussian fit
+            - ``"jain"``: ratio of the two largest magnitudes, solved exactly
+              for a Hann-windowed sinusoid
+        """
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator {estimator!r}, expected one of {ESTIMATORS}")
+        self.sampling_rate = sampling_rate
+        self.f_min = f_min
+        self.f_max = f_max
+        self.full_scale = full_scale
+        self.workers = workers
+        self.estimator = estimator
+        self._plans = {}
+        self._scratch = {}
+
+    def _plan(self, n):
+        """Scaled window and band slice for FFT length *n*, built on first use."""
+        if n not in self._plans:
+            window = np.hanning(n) / self.full_scale
+            frequencies = rfftfreq(n, 1/self.sampling_rate)
+            lo, hi = np.searchsorted(frequencies, [self.f_min, self.f_max])
+            hi = min(hi + 1, len(frequencies))
+            self._plans[n] = (window, frequencies[lo:hi], slice(lo, hi))
+        return self._plans[n]
+
+    def window(self, n):
+        """Hann window of length *n*, scaled by 1/full_scale."""
+        return self._plan(n)[0]
+
+    def frequencies(self, n):
+        """Frequencies in Hz of the band-limited bins for FFT length *n*."""
+        return self._plan(n)[1]
+
+    def power(self, frames, out=None):
+        """
+        Linear power of the band-limited bins of one or more frames.
+
+        Parameters
+        ----------
+        frames : ndarray
+            Raw samples, 1-D for a single frame or 2-D with one frame per row.
+
+        out : ndarray
+            Optional preallocated output of the band shape.
+        """
+        n = frames.shape[-1]
+        window, _, band = self._plan(n)
+        key = frames.shape
+        if key not in self._scratch:
+            self._scratch[key] = np.empty(key)
+        x = self._scratch[key]
+
+        # Remove DC offset, normalise and window in place
+        np.subtract(frames, frames.mean(axis=-1, keepdims=True), out=x)
+        x *= window
+        spectrum = rfft(x, axis=-1, workers=self.workers)[..., band]
+
+        if out is None:
+            out = np.empty(spectrum.shape)
+        np.multiply(spectrum.real, spectrum.real, out=out)
+        spectrum.imag *= spectrum.imag
+        out += spectrum.imag
+        out /= n
+        return out
+
+    def psd(self, frames, out=None):
+        """Band-limited power spectral density in dB, see `power`."""
+        out = self.power(frames, out)
+        np.log10(out, out=out)
+        out *= 10
+        return out
+
+    def interpolate(self, psd, index):
+        """
+        Offset in bins, between -0.5 and 0.5, of the true peak from bin
+        *index* of a PSD in dB, using the configured estimator.
+        """
+        if self.estimator == "none" or index == 0 or index == len(psd) - 1:
+            return 0.0
+        a, b, c = psd[index - 1:index + 2]
+        if self.estimator == "gaussian":
+            # dB is already a log magnitude
+            denominator = a - 2*b + c
+            return 0.5*(a - c)/denominator if denominator else 0.0
+        a, b, c = 10**(np.array([a, b, c])/20) # linear magnitude
+        if self.estimator == "parabolic":
+            denominator = a - 2*b + c
+            return 0.5*(a - c)/denominator if denominator else 0.0
+        # Hann window magnitude ratio |X[k+1]|/|X[k]| = (1 + d)/(2 - d)
+        if c > a:
+            ratio = c/b
+            return (2*ratio - 1)/(ratio + 1)
+        ratio = a/b
+        return -(2*ratio - 1)/(ratio + 1)
+
+    def find_peak(self, psd, frequencies, threshold):
+        """
+        Pick the fundamental from a band-limited PSD.
+
+        Returns
+        -------
+        peak_freq : float
+            Frequency of the first peak over *threshold*, or of the strongest
+            bin if no peak is over it, refined between bins by the estimator.
+
+        peak : float
+            Level of that bin in dB.
+        """
+        peaks, _ = find_peaks(psd, height=threshold)
+        if peaks.size == 0:
+            # If no peaks over threshold, give the strongest frequency
+            index = np.argmax(psd)
+        else:
+            # Find fundamental peak
+            index = peaks[0]
+        bin_width = frequencies[1] - frequencies[0]
+        return frequencies[index] + self.interpolate(psd, index)*bin_width, psd[index]
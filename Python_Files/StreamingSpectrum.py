@@ -0,0 +1,111 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingSpectrum:
+    def __init__(self, frame_size, hop_size, analyzer, n_average=1):
+        """
+        Hop-scheduled short-time Fourier transform of a `SampleRing`.
+
+        A new frame is only transformed once *hop_size* new samples have
+        arrived, so the cost of keeping the spectrum current scales with the
+        number of new samples rather than with *frame_size*. The published
+        PSD is the running average of the last *n_average* frames, updated by
+        adding the newest frame and dropping the oldest.
+
+        Parameters
+        ----------
+        frame_size : int
+            FFT length of each frame.
+
+        hop_size : int
+            Samples between the starts of consecutive frames.
+
+        analyzer : SpectrumAnalyzer
+            Computes the band-limited power of each frame.
+
+        n_average : int
+            Number of frames averaged into `psd`.
+        """
+        self.frame_size = frame_size
+        self.hop_size = hop_size
+        self.n_average = n_average
+        self.analyzer = analyzer
+        self.frequencies = analyzer.frequencies(frame_size)
+        n_bins = len(self.frequencies)
+
+        # Latest averaged band-limited spectrum in dB, None until the first
+        # full frame
+        self.psd = None
+        # Sample number one past the end of the newest frame in `psd`
+        self.frame_index = None
+
+        self._history = np.zeros((n_average, n_bins))
+        self._sum = np.zeros(n_bins)
+        self._psd = np.empty(n_bins)
+        self._count = 0
+        self._slot = 0
+        self._next_end = frame_size
+
+    def transform(self, samples):
+        """
+        Batch mode: band-limited PSD in dB of every full frame in *samples*.
+
+        Returns
+        -------
+        psd : ndarray
+            One row per frame, frames spaced *hop_size* samples apart.
+        """
+        frames = sliding_window_view(samples, self.frame_size)[::self.hop_size]
+        return self.analyzer.psd(frames)
+
+    def update(self, ring, index=None):
+        """
+        Transform any frames which have become due.
+
+        Parameters
+        ----------
+        ring : SampleRing
+            Ring holding the raw samples.
+
+        index : int
+            Sample number to treat as the newest, e.g. from
+            `SerialReader.snapshot`. Defaults to ``ring.index``.
+
+        Returns
+        -------
+        updated : bool
+            True if `psd` changed.
+        """
+        index = ring.index if index is None else index
+        if index < self._next_end:
+            return False
+
+        # Only the newest frames that still contribute to the average, and are
+        # still held in the ring, need transforming
+        last_end = self._next_end + (index - self._next_end)//self.hop_size*self.hop_size
+        oldest_end = max(self._next_end, index - ring.capacity + self.frame_size)
+        n_frames = min((last_end - oldest_end)//self.hop_size + 1, self.n_average)
+        first_end = last_end - (n_frames - 1)*self.hop_size
+        samples = ring.latest(last_end - first_end + self.frame_size, last_end)
+
+        frames = sliding_window_view(samples, self.frame_size)[::self.hop_size]
+        for power in self.analyzer.power(frames):
+            if self._count == self.n_average:
+                self._sum -= self._history[self._slot]
+            else:
+                self._count += 1
+            self._history[self._slot] = power
+            self._sum += power
+            self._slot = (self._slot + 1) % self.n_average
+            if self._slot == 0:
+                # Resynchronise so rounding errors can't accumulate
+                self._sum = self._history[:self._count].sum(axis=0)
+
+        self._next_end = last_end + self.hop_size
+        self.frame_index = last_end
+        np.divide(self._sum, self._count, out=self._psd)
+        np.log10(self._psd, out=self._psd)
+        self._psd *= 10
+        self.psd = self._psd
+        return True
@@ -0,0 +1,144 @@
+import numpy as np
+
+
+class StrumTuner:
+    def __init__(self, sampling_rate, tuning, window_size=8192, full_scale=128, n_harmonics=3,
+                 span=50, step=5, threshold=-30):
+        """
+        Tune every string of a tuning at once from a single strum.
+
+        A bank of narrowband detectors is centred on each string's target
+        note and its harmonics, on a grid of offsets of *step* cents out to
+        *span* cents either side. Each detector is the Goertzel output at
+        its frequency, i.e. one DFT term of the Hann-windowed frame, so the
+        whole bank is evaluated in one pass as a product of a precomputed
+        complex kernel with the frame. The levels in dB of each string's
+        harmonics are averaged, the strongest offset is refined with a
+        parabola and reported as the string's error in cents. The kernel is
+        only built by the first measurement after the tuning changes.
+
+        Harmonics which land on a lower harmonic of another string (e.g. the
+        third harmonic of E2 on B3) are left out. Strings an octave apart,
+        as in the open tunings, still share energy, so their readings are
+        less reliable in a strum than plucked alone.
+
+        Parameters
+        ----------
+        sampling_rate : float
+            Sample rate in Hz.
+
+        tuning : dict
+            Note names and frequencies in Hz, see `Tunings`.
+
+        window_size : int
+            Samples analysed per measurement.
+
+        full_scale : float
+            Sample amplitude which normalises to 1, 128 for 8-bit samples.
+
+        n_harmonics : int
+            Harmonics of each string combined, starting at the fundamental.
+
+        span, step : float
+            Range and spacing of the offsets searched, in cents.
+
+        threshold : float
+            Average level in dB of the harmonics needed for a string to count
+            as sounding, on the same scale as `SpectrumAnalyzer.psd`.
+        """
+        self.sampling_rate = sampling_rate
+        self.window_size = window_size
+        self.full_scale = full_scale
+        self.n_harmonics = n_harmonics
+        self.threshold = threshold
+        self.offsets = np.arange(-span, span + step/2, step)
+        # Each kernel row is built as the outer product of a coarse and a
+        # fine phase step, so its length is padded to a whole number of
+        # fine blocks, with the padding zero in the window
+        self._block = int(np.ceil(np.sqrt(window_size)))
+        padded = -(-window_size//self._block)*self._block
+        self._window = np.zeros(padded, dtype=np.float32)
+        self._window[:window_size] = np.hanning(window_size) / full_scale
+        self._x = np.zeros(padded, dtype=np.float32)
+        self.set_tuning(tuning)
+
+    def set_tuning(self, tuning):
+        """Set up the detector bank for a new tuning."""
+        self.notes = list(tuning)
+        self.note_frequencies = np.array(list(tuning.values()), dtype=np.float64)
+
+        # Detector frequencies, shape (string, harmonic, offset)
+        harmonics = np.arange(1, self.n_harmonics + 1)
+        detune = 2**(self.offsets/1200)
+        f = self.note_frequencies[:, None, None] * harmonics[None, :, None] * detune[None, None, :]
+        self._shape = f.shape
+
+        # Drop harmonics within two bins of a lower harmonic of another
+        # string, e.g. the third harmonic of E2 under B3, as that string
+        # would dominate them
+        centre = f[:, :, len(self.offsets)//2]
+        near = np.abs(centre[:, :, None, None] - centre[None, None, :, :]) < 2*self.sampling_rate/self.window_size
+        lower = harmonics[None, :, None, None] > harmonics[None, None, None, :]
+        other = ~np.eye(len(centre), dtype=bool)[:, None, :, None]
+        self._weights = (~(near & lower & other).any(axis=(2, 3))).astype(np.float64)
+        self._weights /= self._weights.sum(axis=1, keepdims=True)
+
+        self._frequencies = f.ravel()
+        self._kernel = None
+
+    def _build_kernel(self):
+        """
+        One windowed DFT term per detector, in single precision to halve the
+        size of the kernel. Sample ``n = q*block + r`` of a row is
+        ``exp(-j w q block) * exp(-j w r)``, so only the two short factors
+        are computed with ``exp`` and the kernel is written directly in
+        complex64.
+        """
+        w = -2*np.pi*self._frequencies/self.sampling_rate
+        coarse = np.exp(1j*np.outer(w, np.arange(0, len(self._x), self._block))).astype(np.complex64)
+        fine = np.exp(1j*np.outer(w, np.arange(self._block))).astype(np.complex64)
+        kernel = np.empty((len(w), len(self._x)), dtype=np.complex64)
+        np.multiply(coarse[:, :, None], fine[:, None, :], out=kernel.reshape(len(w), -1, self._block))
+        kernel *= self._window
+        self._kernel = kernel
+
+    def measure(self, samples):
+        """
+        Error of every string in the newest *window_size* samples.
+
+        Returns
+        -------
+        cents : ndarray
+            Error of each string in cents, clipped to +/- *span*.
+
+        level : ndarray
+            Average level of each string's harmonics in dB.
+
+        sounding : ndarray
+            True for strings over the threshold.
+        """
+        if self._kernel is None:
+            self._build_kernel()
+        frame = samples[-self.window_size:]
+        np.subtract(frame, np.mean(frame), out=self._x[:len(frame)], casting="unsafe")
+        self._x[len(frame):] = 0
+
+        output = self._kernel @ self._x
+        power = (output.real**2 + output.imag**2).reshape(self._shape) / self.window_size
+        # Harmonic product, in dB an average, so one harmonic lit up by
+        # another string cannot outvote the string's own harmonics
+        psd = 10*np.log10(power + 1e-20)
+        total = np.einsum("sho,sh->so", psd, self._weights) # (string, offset)
+
+        best = np.argmax(total, axis=1)
+        strings = np.arange(len(best))
+        inner = np.clip(best, 1, len(self.offsets) - 2)
+        a, b, c = (total[strings, inner - 1], total[strings, inner], total[strings, inner + 1])
+        denominator = a - 2*b + c
+        shift = np.divide(0.5*(a - c), denominator, out=np.zeros_like(a), where=denominator != 0)
+        shift = np.where(best == inner, np.clip(shift, -0.5, 0.5), 0)
+
+        step = self.offsets[1] - self.offsets[0]
+        cents = self.offsets[best] + shift*step
+        level = total[strings, best]
+        return cents, level, level > self.threshold
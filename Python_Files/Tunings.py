@@ -0,0 +1,184 @@
+"""
+Guitar tunings and closest note lookup
+
+"""
+from bisect import bisect_left
+import math
+import numpy as np
+
+
+# Tunings from https://pages.mtu.edu/~suits/notefreqs.html
+standard_tuning = {
+    'E2': 82.4, # 82.4
+    'A2': 110.0,
+    'D3': 146.8,
+    'G3': 196.0,
+    'B3': 246.9,
+    'E4': 329.6
+}
+
+drop_d_tuning = {
+    'D2': 73.4,
+    'A2': 110.0,
+    'D3': 146.8,
+    'G3': 196.0,
+    'B3': 246.9,
+    'E4': 329.6
+}
+
+half_step_down_tuning = {
+    'Eb2': 77.8,
+    'Ab2': 103.8,
+    'Db3': 138.6,
+    'Gb3': 185.0,
+    'Bb3': 233.1,
+    'Eb4': 311.1
+}
+
+open_g_tuning = {
+    'D2': 73.4,
+    'G2': 98.0,
+    'D3': 146.8,
+    'G3': 196.0,
+    'B3': 246.9,
+    'D4': 293.7
+}
+
+dadgad_tuning = {
+    'D2': 73.4,
+    'A2': 110.0,
+    'D3': 146.8,
+    'G3': 196.0,
+    'A3': 220.0,
+    'D4': 293.7
+}
+
+open_d_tuning = {
+    'D2': 73.4,
+    'A2': 110.0,
+    'D3': 146.8,
+    'F#3': 185.0,
+    'A3': 220.0,
+    'D4': 293.7
+}
+
+whole_step_down_tuning = {
+    'D2': 73.4,
+    'G2': 98.0,
+    'C3': 130.8,
+    'F3': 174.6,
+    'A3': 220.0,
+    'D4': 293.7
+}
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+
+def chromatic_notes(a4=440.0, lowest=23, highest=88):
+    """
+    Every equal-tempered note between two MIDI note numbers, by default from
+    B0, the low string of a five-string bass, to E6, the top fret of a
+    24-fret guitar, with A4 at *a4* Hz
+    """
+    return {f"{NOTE_NAMES[m % 12]}{m // 12 - 1}": a4 * 2**((m - 69)/12)
+            for m in range(lowest, highest + 1)}
+
+
+chromatic_tuning = chromatic_notes()
+
+tunings = [standard_tuning,
+           drop_d_tuning,
+           half_step_down_tuning,
+           open_g_tuning,
+           dadgad_tuning,
+           open_d_tuning,
+           whole_step_down_tuning,
+           chromatic_tuning]
+
+tuning_labels = ["Standard","Drop D","Half Step","Open G","DADGAD","Open D","Whole Step","Chromatic"]
+
+
+class NoteIndex:
+    def __init__(self, tuning):
+        """
+        Tuning compiled into a sorted frequency table for fast lookup.
+
+        The closest note to any frequency is found with one binary search
+        over the midpoints between neighbouring notes, so arrays of
+        frequencies are looked up in a single call and a chromatic table
+        costs no more than a six-string tuning.
+
+        Parameters
+        ----------
+        tuning : dict
+            Note names and frequencies in Hz.
+        """
+        order = np.argsort(list(tuning.values()), kind="stable")
+        self.names = np.array(list(tuning), dtype=object)[order]
+        self.frequencies = np.array(list(tuning.values()), dtype=np.float64)[order]
+        self._bounds = (self.frequencies[1:] + self.frequencies[:-1]) / 2
+        # Plain lists for single lookups, which NumPy would only slow down
+        self._bound_list = self._bounds.tolist()
+        self._table = list(zip(self.names.tolist(), self.frequencies.tolist()))
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def lookup(self, frequencies):
+        """
+        Closest notes to one or more frequencies
+
+        Returns
+        -------
+        notes : ndarray
+            Note names.
+
+        note_frequencies : ndarray
+            Their frequencies in Hz.
+
+        error : ndarray
+            Frequency minus note frequency in Hz.
+
+        error_c : ndarray
+            The same in cents, 0 for frequencies which are not positive.
+        """
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        i = np.searchsorted(self._bounds, frequencies)
+        note_frequencies = self.frequencies[i]
+        ratio = np.divide(frequencies, note_frequencies, out=np.ones_like(frequencies),
+                          where=frequencies > 0)
+        return self.names[i], note_frequencies, frequencies - note_frequencies, 1200*np.log2(ratio)
+
+    def closest(self, frequency):
+        """
+        Closest note to a single frequency, as its name, its frequency and
+        the error in Hz and cents
+        """
+        note, note_freq = self._table[bisect_left(self._bound_list, frequency)]
+        error_c = 1200*math.log2(frequency/note_freq) if frequency > 0 else 0.0
+        return note, note_freq, frequency - note_freq, error_c
+
+
+_indexes = {}
+
+
+def note_index(tuning):
+    """
+    `NoteIndex` of a tuning, compiled on first use
+    """
+    if isinstance(tuning, NoteIndex):
+        return tuning
+    key = tuple(tuning.items())
+    if key not in _indexes:
+        _indexes[key] = NoteIndex(tuning)
+    return _indexes[key]
+
+
+def closest_note(peak_frequency, tuning):
+    """
+    Find the note in a tuning closest to a frequency
+
+    Returns the note name, its frequency and the error in Hz and cents
+    """
+    note, note_freq, error, error_c = note_index(tuning).closest(peak_frequency)
+    return note, note_freq, round(error, 1), round(error_c, 1)
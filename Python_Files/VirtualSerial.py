@@ -0,0 +1,296 @@
+import os
+import struct
+import time
+import numpy as np
+from Capture import CaptureReader
+
+
+class CaptureSource:
+    def __init__(self, path, sampling_rate=20000, loop=True):
+        """
+        Replay a raw capture of the bytes sent by the Arduino.
+
+        The file is memory-mapped, so captures of any length are streamed
+        without being loaded into RAM. The sample type and rate of a
+        ``.raw`` file written by `CaptureWriter` are read from its ``.json``
+        and only 8-bit captures are accepted, since the samples are replayed
+        as the bytes of the unframed protocol.
+
+        Parameters
+        ----------
+        path : str
+            File of raw 8-bit samples.
+
+        sampling_rate : float
+            Rate the capture was recorded at in Hz, for files without a
+            ``.json``.
+
+        loop : bool
+            Start again from the beginning when the end is reached.
+        """
+        base, ext = os.path.splitext(path)
+        if ext.lower() in (".raw", ".json") and os.path.exists(base + ".json"):
+            capture = CaptureReader(base)
+            if capture.dtype != np.uint8:
+                raise ValueError(f"{path} holds {8*capture.dtype.itemsize}-bit samples, only 8-bit "
+                                 "captures can be replayed, use Analyse.py to re-score it")
+            sampling_rate = capture.sampling_rate
+            self._data = capture.samples
+        else:
+            self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.sampling_rate = sampling_rate
+        self.loop = loop
+        self._pos = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def seek(self, position):
+        """Continue reading from sample number *position*."""
+        self._pos = position
+
+    def read(self, n):
+        """Next *n* samples as uint8, fewer once the capture runs out."""
+        out = self._data[self._pos:self._pos + n]
+        self._pos += len(out)
+        if self.loop and len(out) < n and len(self._data):
+            self._pos = 0
+            out = np.concatenate((out, self.read(n - len(out))))
+        return np.asarray(out)
+
+
+class WavSource:
+    def __init__(self, path, sampling_rate=20000, loop=True):
+        """
+        Replay a mono or multichannel PCM WAV file as 8-bit samples.
+
+        The sample data is memory-mapped and converted chunk by chunk. The
+        first channel is used and it is linearly resampled to
+        *sampling_rate* when the file was recorded at another rate.
+
+        Parameters
+        ----------
+        path : str
+            8-bit or 16-bit PCM WAV file.
+
+        sampling_rate : float
+            Rate to deliver samples at in Hz.
+
+        loop : bool
+            Start again from the beginning when the end is reached.
+        """
+        self.sampling_rate = sampling_rate
+        self.loop = loop
+        channels, rate, width, offset, size = self._parse_header(path)
+        if width == 1:
+            dtype = np.uint8
+        elif width == 2:
+            dtype = np.dtype("<i2")
+        else:
+            raise ValueError("Only 8-bit and 16-bit PCM WAV files are supported")
+        frames = size // (width*channels)
+        self._data = np.memmap(path, dtype=dtype, mode="r", offset=offset,
+                               shape=(frames, channels))[:, 0]
+        self._ratio = rate / sampling_rate
+        self._pos = 0 # in output samples
+        self._length = int(frames / self._ratio)
+
+    @staticmethod
+    def _parse_header(path):
+        """Channels, rate, sample width, data offset and data size of a WAV."""
+        with open(path, "rb") as f:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave != b"WAVE":
+                raise ValueError(f"{path} is not a WAV file")
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{path} has no data chunk")
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = struct.unpack("<HHIIHH", f.read(16))
+                    f.seek(chunk_size - 16 + chunk_size % 2, os.SEEK_CUR)
+                elif chunk_id == b"data":
+                    if fmt is None or fmt[0] != 1:
+                        raise ValueError(f"{path} is not PCM")
+                    _, channels, rate, _, _, bits = fmt
+                    return channels, rate, bits // 8, f.tell(), chunk_size
+                else:
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+    def _convert(self, samples):
+        """Map PCM samples onto the Arduino's unsigned 8-bit range."""
+        if self._data.dtype == np.uint8:
+            return samples
+        return (samples.astype(np.int32) // 256 + 128).astype(np.uint8)
+
+    def __len__(self):
+        return self._length
+
+    def seek(self, position):
+        """Continue reading from output sample number *position*."""
+        self._pos = position
+
+    def read(self, n):
+        """Next *n* samples as uint8, fewer once the file runs out."""
+        n_out = min(n, self._length - self._pos)
+        if self._ratio == 1:
+            out = self._convert(np.asarray(self._data[self._pos:self._pos + n_out]))
+        else:
+            positions = (self._pos + np.arange(n_out)) * self._ratio
+            lo = int(positions[0]) if n_out else 0
+            hi = min(int(positions[-1]) + 2, len(self._data)) if n_out else 0
+            source = np.asarray(self._data[lo:hi], dtype=np.float64)
+            resampled = np.interp(positions - lo, np.arange(hi - lo), source)
+            out = self._convert(resampled.astype(self._data.dtype))
+        self._pos += n_out
+        if self.loop and n_out < n and self._length:
+            self._pos = 0
+            out = np.concatenate((out, self.read(n - n_out)))
+        return out
+
+
+class PluckSource:
+    def __init__(self, frequencies=(82.4, 110.0, 146.8, 196.0, 246.9, 329.6),
+                 sampling_rate=20000, interval=2.0, harmonics=(1.0, 0.5, 0.33, 0.25, 0.2),
+                 decay=1.5, noise=1.0):
+        """
+        Synthesise an endless sequence of plucked strings.
+
+        Each pluck is a sum of exponentially decaying harmonics, with higher
+        harmonics dying away faster, plus a little noise, centred on the
+        8-bit mid-scale like the Arduino's ADC output.
+
+        Parameters
+        ----------
+        frequencies : Iterable[float]
+            Fundamentals in Hz, plucked in turn.
+
+        sampling_rate : float
+            Sample rate in Hz.
+
+        interval : float
+            Seconds between plucks.
+
+        harmonics : Iterable[float]
+            Relative amplitude of each harmonic, starting at the fundamental.
+
+        decay : float
+            Time constant in seconds of the fundamental.
+
+        noise : float
+            Standard deviation of added noise in 8-bit levels.
+        """
+        self.sampling_rate = sampling_rate
+        self.loop = True
+        self._frequencies = np.asarray(frequencies, dtype=np.float64)
+        self._interval = int(interval * sampling_rate)
+        self._harmonics = np.asarray(harmonics, dtype=np.float64)
+        self._numbers = np.arange(1, len(harmonics) + 1)
+        self._decay = decay
+        self._noise = noise
+        self._amplitude = 100 / self._harmonics.sum()
+        self._rng = np.random.default_rng()
+        self._pos = 0
+
+    def read(self, n):
+        """Next *n* synthesised samples as uint8."""
+        positions = self._pos + np.arange(n)
+        self._pos += n
+        f0 = self._frequencies[(positions // self._interval) % len(self._frequencies)]
+        t = (positions % self._interval) / self.sampling_rate
+
+        # One row per harmonic, summed in a single pass
+        envelope = np.exp(-np.outer(self._numbers, t) / self._decay)
+        phase = 2*np.pi*np.outer(self._numbers, f0*t)
+        signal = self._harmonics @ (envelope * np.sin(phase))
+        signal = 128 + self._amplitude*signal + self._noise*self._rng.standard_normal(n)
+        return np.clip(signal, 0, 255).astype(np.uint8)
+
+
+def open_source(path, sampling_rate=20000, loop=True):
+    """Pick a replay source for *path* from its extension."""
+    if path.lower().endswith(".wav"):
+        return WavSource(path, sampling_rate, loop)
+    return CaptureSource(path, sampling_rate, loop)
+
+
+class VirtualSerial:
+    def __init__(self, source, speed=1.0, max_chunk=4096):
+        """
+        Drop-in stand-in for `serial.Serial` which delivers samples from a
+        source instead of an Arduino.
+
+        Parameters
+        ----------
+        source : CaptureSource, WavSource or PluckSource
+            Where the samples come from.
+
+        speed : float or None
+            Pacing relative to real time: 1 for real time, above 1 for faster
+            than real time, None to deliver as fast as the reader can take it.
+
+        max_chunk : int
+            Bytes reported by `in_waiting` when pacing is disabled.
+        """
+        self.source = source
+        self.speed = speed
+        self.max_chunk = max_chunk
+        self.timeout = None
+        self.is_open = True
+        self.bytes_written = 0
+        self._start = None
+        self._sent = 0
+        self._exhausted = False
+
+    def _due(self):
+        """Bytes the pacing allows to have been delivered so far."""
+        if self._start is None:
+            self._start = time.perf_counter()
+        elapsed = time.perf_counter() - self._start
+        return int(elapsed * self.source.sampling_rate * self.speed)
+
+    @property
+    def in_waiting(self):
+        """Number of bytes that can be read without blocking."""
+        if self._exhausted:
+            return 0
+        if self.speed is None:
+            return self.max_chunk
+        return max(0, self._due() - self._sent)
+
+    def read(self, size=1):
+        """Read up to *size* bytes, blocking for at most `timeout` seconds."""
+        if self._exhausted:
+            return b""
+        if self.speed is not None:
+            rate = self.source.sampling_rate * self.speed
+            self._due()
+            ready_at = self._start + (self._sent + size) / rate
+            wait = ready_at - time.perf_counter()
+            if self.timeout is not None:
+                wait = min(wait, self.timeout)
+            if wait > 0:
+                time.sleep(wait)
+            size = min(size, max(0, self._due() - self._sent))
+        data = self.source.read(size)
+        if len(data) < size:
+            self._exhausted = True
+        self._sent += len(data)
+        return data.tobytes()
+
+    def readinto(self, b):
+        """Read into a writable buffer, returning the number of bytes read."""
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def write(self, data):
+        """Accept commands meant for the Arduino, e.g. the distortion toggle."""
+        n = len(bytes(bytearray(data)))
+        self.bytes_written += n
+        return n
+
+    def close(self):
+        self.is_open = False
@@ -0,0 +1,80 @@
+import numpy as np
+from scipy.signal import ZoomFFT
+
+
+class ZoomSpectrum:
+    def __init__(self, analyzer, window_size=4096, coarse_size=2048, points=64, width=1):
+        """
+        Two-stage spectrum: a short coarse FFT over the whole band to find a
+        candidate peak, then a zoom FFT (chirp-z transform) giving a dense
+        spectrum over a narrow band around it.
+
+        The zoomed band spans *width* coarse bins either side of the
+        candidate bin, sampled at *points* frequencies. A transform is built
+        the first time each coarse bin is zoomed into and reused after that,
+        so per frame the cost is one short FFT and one chirp-z transform of
+        *window_size* samples.
+
+        Parameters
+        ----------
+        analyzer : SpectrumAnalyzer
+            Supplies the window, band and scaling, so levels match its PSD.
+
+        window_size : int
+            Samples in the zoomed transform.
+
+        coarse_size : int
+            FFT length of the coarse search.
+
+        points : int
+            Frequencies in the zoomed band.
+
+        width : float
+            Half-width of the zoomed band in coarse bins.
+        """
+        self.analyzer = analyzer
+        self.window_size = window_size
+        self.coarse_size = coarse_size
+        self.points = points
+        self.width = width
+        self.coarse_frequencies = analyzer.frequencies(coarse_size)
+        self._bin_width = analyzer.sampling_rate / coarse_size
+        self._x = np.empty(window_size)
+        self._zooms = {}
+
+    def coarse(self, samples):
+        """Band-limited PSD in dB of the newest *coarse_size* samples."""
+        return self.analyzer.psd(samples[-self.coarse_size:])
+
+    def _zoom(self, index):
+        """Chirp-z transform and frequencies around coarse bin *index*."""
+        if index not in self._zooms:
+            centre = self.coarse_frequencies[index]
+            band = [max(centre - self.width*self._bin_width, 0),
+                    centre + self.width*self._bin_width]
+            transform = ZoomFFT(self.window_size, band, self.points,
+                                fs=self.analyzer.sampling_rate, endpoint=True)
+            self._zooms[index] = (transform, np.linspace(band[0], band[1], self.points))
+        return self._zooms[index]
+
+    def zoom(self, samples, index):
+        """
+        Dense PSD in dB of the newest *window_size* samples around coarse bin
+        *index*.
+
+        Returns
+        -------
+        frequencies : ndarray
+            Frequencies of the zoomed band in Hz.
+
+        psd : ndarray
+            Level at each of them in dB, on the same scale as
+            `SpectrumAnalyzer.psd` for *window_size* samples.
+        """
+        transform, frequencies = self._zoom(index)
+        frame = samples[-self.window_size:]
+        np.subtract(frame, np.mean(frame), out=self._x)
+        self._x *= self.analyzer.window(self.window_size)
+        spectrum = transform(self._x)
+        psd = 10*np.log10((spectrum.real**2 + spectrum.imag**2) / self.window_size + 1e-20)
+        return frequencies, psd
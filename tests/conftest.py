@@ -0,0 +1,16 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The modules are run as scripts from Python_Files and import each other flat
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Python_Files"))
+
+
+@pytest.fixture
+def make_packet():
+    """Build packets of the framed protocol, see `PacketDecoder`."""
+    def make(seq, payload, flags=0):
+        body = bytes([seq & 0xFF, seq >> 8 & 0xFF, flags]) + bytes(np.asarray(payload, dtype=np.uint8))
+        return bytes([0xA5, 0x5A]) + body + bytes([-sum(body) % 256])
+    return make
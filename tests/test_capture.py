@@ -0,0 +1,75 @@
+import time
+import numpy as np
+import pytest
+from Capture import CaptureReader, CaptureWriter
+
+
+def _blocks(n, size=100):
+    return [np.full(size, k, dtype=np.uint8) for k in range(n)]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path/"capture")
+    writer = CaptureWriter(path, sampling_rate=1000)
+    writer.start()
+    for k, block in enumerate(_blocks(5)):
+        writer.write(block, timestamp=10.0 + 0.1*k)
+    writer.close()
+
+    capture = CaptureReader(path)
+    assert len(capture) == 500 and capture.duration == 0.5
+    np.testing.assert_array_equal(capture[::100], np.arange(5))
+    np.testing.assert_allclose(capture.sample_times(199, 201), [10.1, 10.101])
+    assert len(capture.gaps) == 0
+
+
+def test_dropped_blocks_are_recorded(tmp_path):
+    path = str(tmp_path/"capture")
+    # Not started, so the queue fills after two blocks
+    writer = CaptureWriter(path, sampling_rate=1000, max_blocks=2)
+    for k, block in enumerate(_blocks(4)):
+        writer.write(block, timestamp=10.0 + 0.1*k)
+    assert writer.dropped_blocks == 2 and writer.samples_lost == 200
+    writer.close()
+
+    capture = CaptureReader(path)
+    assert len(capture) == 200
+    np.testing.assert_array_equal(capture.gaps["start"], [200])
+    np.testing.assert_array_equal(capture.gaps["length"], [200])
+    np.testing.assert_array_equal(capture.gaps["time"], [10.3])
+    # Blocks dropped after the last one written are timed by the last kept
+    assert capture.sample_times(199, 201).tolist() == [10.1, 10.1]
+
+
+def test_times_after_a_gap(tmp_path):
+    path = str(tmp_path/"capture")
+    writer = CaptureWriter(path, sampling_rate=1000, max_blocks=1)
+    blocks = _blocks(4)
+    writer.write(blocks[0], timestamp=10.0)
+    writer.write(blocks[1], timestamp=10.1) # dropped
+    writer.write(blocks[2], timestamp=10.2) # dropped
+    writer.start()
+    while not writer._queue.empty():
+        time.sleep(0.001)
+    writer.write(blocks[3], timestamp=10.3)
+    writer.close()
+
+    capture = CaptureReader(path)
+    assert len(capture) == 200
+    assert capture.gaps[["start", "length"]].tolist() == [(100, 200)]
+    np.testing.assert_array_equal(capture[99:101], [0, 3])
+    # The block after the gap runs up to 10.3 from the last dropped block
+    # at 10.2, not from the last kept one at 10.0
+    assert capture.sample_times(99, 100)[0] == pytest.approx(10.0)
+    times = capture.sample_times(100, 200)
+    assert 10.2 < times[0] < 10.201 and times[-1] == pytest.approx(10.3)
+
+
+def test_close_does_not_block_on_full_queue(tmp_path):
+    path = str(tmp_path/"capture")
+    writer = CaptureWriter(path, max_blocks=1)
+    writer.write(np.zeros(10, np.uint8))
+    writer.write(np.zeros(10, np.uint8))
+    start = time.perf_counter()
+    writer.close()
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+from Decimator import Decimator
+from SampleRing import SampleRing
+
+
+def _one_shot(decimator, x):
+    """Filter and decimate the whole signal at once."""
+    padded = np.concatenate((np.full(len(decimator.taps) - 1, float(x[0])), x))
+    return sliding_window_view(padded, len(decimator.taps))[::decimator.factor] @ decimator.taps
+
+
+@pytest.mark.parametrize("factor, blocks", [(3, [1, 2, 5, 64, 7, 300, 11]), (4, [128]*8), (8, [1]*100 + [999])])
+def test_blocks_match_one_shot(factor, blocks):
+    x = np.random.default_rng(factor).integers(0, 256, sum(blocks)).astype(np.uint8)
+    ring = SampleRing(4096)
+    decimator = Decimator(factor, capacity=4096)
+    produced = 0
+    for n in blocks:
+        ring.extend(x[ring.index:ring.index + n])
+        produced += decimator.update(ring)
+    expected = _one_shot(decimator, x.astype(float))
+    assert produced == len(expected) == -(-len(x)//factor)
+    np.testing.assert_allclose(decimator.ring.latest(produced), expected, rtol=1e-12, atol=1e-9)
+
+
+def test_no_new_samples():
+    ring = SampleRing(64)
+    decimator = Decimator(3, capacity=64)
+    assert decimator.update(ring) == 0
+    ring.extend(np.full(10, 50))
+    assert decimator.update(ring) == 4
+    assert decimator.update(ring) == 0
+    # A constant signal passes at unity gain
+    np.testing.assert_allclose(decimator.ring.latest(), 50)
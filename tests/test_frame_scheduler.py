@@ -0,0 +1,95 @@
+import heapq
+import pytest
+import FrameScheduler as module
+from FrameScheduler import FrameScheduler
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Root:
+    """Runs `after` callbacks in order on a simulated clock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.viewable = True
+        self._queue = []
+        self._n = 0
+
+    def winfo_viewable(self):
+        return self.viewable
+
+    def after(self, ms, callback):
+        self._n += 1
+        heapq.heappush(self._queue, (self.clock.now + ms/1000, self._n, callback))
+        return self._n
+
+    def after_cancel(self, job):
+        self._queue = [item for item in self._queue if item[1] != job]
+        heapq.heapify(self._queue)
+
+    def run(self, seconds):
+        end = self.clock.now + seconds
+        while self._queue and self._queue[0][0] <= end:
+            when, _, callback = heapq.heappop(self._queue)
+            self.clock.now = max(self.clock.now, when)
+            callback()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(module.time, "perf_counter", clock)
+    return clock
+
+
+def _scheduler(clock, cost, **kwargs):
+    root = _Root(clock)
+    frames = []
+
+    def callback(render):
+        frames.append(render)
+        clock.now += cost(render)
+
+    scheduler = FrameScheduler(root, callback, **kwargs)
+    scheduler.start()
+    return root, scheduler, frames
+
+
+def test_paces_cheap_frames(clock):
+    root, scheduler, frames = _scheduler(clock, lambda render: 0.005, fps=30)
+    root.run(2)
+    assert 58 <= len(frames) <= 62
+    assert scheduler.achieved == pytest.approx(30, abs=1.5)
+    assert scheduler.dropped == 0
+
+
+def test_slow_frames_render_back_to_back(clock):
+    root, scheduler, frames = _scheduler(clock, lambda render: 0.040, fps=30)
+    root.run(2)
+    # Every frame renders, one per 40 ms, and the missed slots are dropped
+    assert all(frames)
+    assert scheduler.achieved == pytest.approx(25, abs=1.5)
+    assert scheduler.dropped > 0
+
+
+def test_idle_when_silent_or_hidden(clock):
+    root, scheduler, frames = _scheduler(clock, lambda render: 0.005, fps=30, idle_fps=5, hold=1.0)
+    scheduler.set_silent(True)
+    root.run(0.5)
+    assert scheduler.requested == 30
+    root.run(2)
+    assert scheduler.requested == 5
+    assert scheduler.achieved == pytest.approx(5, abs=0.5)
+
+    scheduler.set_silent(False)
+    root.viewable = False
+    n = len(frames)
+    root.run(1)
+    assert not any(frames[n:]) and 4 <= len(frames) - n <= 6
+    assert scheduler.status() == "FPS: 0.0/5"
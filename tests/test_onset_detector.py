@@ -0,0 +1,53 @@
+import numpy as np
+from OnsetDetector import NoteSegmenter, OnsetDetector
+from SampleRing import SampleRing
+
+RATE = 8000
+
+
+def _signal(seconds, plucks=(), frequency=110.0, seed=0):
+    """Steady noise with decaying plucks at the given times, as 8-bit samples."""
+    t = np.arange(int(seconds*RATE))/RATE
+    x = 2*np.random.default_rng(seed).standard_normal(len(t))
+    for start in plucks:
+        after = t >= start
+        x[after] += 80*np.exp(-(t[after] - start)/0.3)*np.sin(2*np.pi*frequency*(t[after] - start))
+    return np.clip(128 + x, 0, 255).astype(np.uint8)
+
+
+class _Detector:
+    """Pitch detector stand-in which always reports the same pitch."""
+
+    window_size = 1024
+
+    def detect(self, samples):
+        return 110.0, 1.0
+
+
+def _run(samples, consumer, chunk=800):
+    ring = SampleRing(1 << 15)
+    results = []
+    for start in range(0, len(samples), chunk):
+        ring.extend(samples[start:start + chunk])
+        results += consumer.update(ring)
+    return results
+
+
+def test_no_onset_in_steady_noise_at_startup():
+    detector = OnsetDetector(RATE, sensitivity=1.5, silence=-80)
+    assert _run(_signal(1.0), detector) == []
+
+
+def test_onset_at_pluck():
+    detector = OnsetDetector(RATE, sensitivity=1.5, silence=-80)
+    onsets = _run(_signal(1.5, plucks=[1.0]), detector)
+    assert len(onsets) == 1 and abs(onsets[0] - RATE) <= 2*detector.hop_size
+
+
+def test_segmenter_returns_each_note_once():
+    detector = OnsetDetector(RATE, sensitivity=1.5, silence=-40)
+    segmenter = NoteSegmenter(detector, _Detector(), {"A2": 110.0})
+    events = _run(_signal(4.0, plucks=[1.0, 2.5]), segmenter)
+    assert [event.note for event in events] == ["A2", "A2"]
+    assert abs(events[0].onset - 1.0) < 0.1 and abs(events[1].onset - 2.5) < 0.1
+    assert not hasattr(segmenter, "events")
@@ -0,0 +1,89 @@
+import numpy as np
+from PacketDecoder import PacketDecoder, unpack10
+
+
+def _payload(seq):
+    return np.full(8, 10 + seq)
+
+
+def test_split_across_blocks(make_packet):
+    decoder = PacketDecoder(payload_size=8)
+    data = b"".join(make_packet(seq, _payload(seq)) for seq in range(5))
+    samples = []
+    for start in range(0, len(data), 7):
+        block, missing = decoder.decode(data[start:start + 7])
+        assert not missing.any()
+        samples.append(block)
+    np.testing.assert_array_equal(np.concatenate(samples), np.repeat(10 + np.arange(5), 8))
+    assert decoder.packets_received == 5 and decoder.packets_lost == 0
+
+
+def test_resync_after_garbage_and_corruption(make_packet):
+    decoder = PacketDecoder(payload_size=8)
+    corrupt = bytearray(make_packet(1, _payload(1)))
+    corrupt[7] ^= 0xFF
+    data = (b"\x00\xA5\x13" + make_packet(0, _payload(0)) + bytes(corrupt)
+            + b"\xA5\x5A\x01" + make_packet(2, _payload(2)) + make_packet(3, _payload(3)))
+    samples, missing = decoder.decode(data)
+    # The corrupted packet is lost and filled in
+    np.testing.assert_array_equal(samples[::8], [10, 128, 12, 13])
+    np.testing.assert_array_equal(missing[::8], [False, True, False, False])
+    assert decoder.checksum_errors == 2 and decoder.packets_lost == 1
+
+
+def test_gap_fill_and_mask(make_packet):
+    decoder = PacketDecoder(payload_size=8, fill_value=100)
+    data = b"".join(make_packet(seq, _payload(seq)) for seq in (0, 1, 4))
+    samples, missing = decoder.decode(data)
+    assert len(samples) == len(missing) == 5*8
+    np.testing.assert_array_equal(samples[::8], [10, 11, 100, 100, 14])
+    np.testing.assert_array_equal(missing, np.repeat([False, False, True, True, False], 8))
+    assert decoder.loss_rate == 2/5
+
+
+def test_gap_across_calls_and_wrap(make_packet):
+    decoder = PacketDecoder(payload_size=8)
+    decoder.decode(make_packet(65535, _payload(0)))
+    samples, missing = decoder.decode(make_packet(1, _payload(1)))
+    np.testing.assert_array_equal(missing[::8], [True, False])
+    assert decoder.packets_lost == 1
+
+
+def test_restart_is_not_filled(make_packet):
+    decoder = PacketDecoder(payload_size=8, max_gap=4)
+    data = make_packet(0, _payload(0)) + make_packet(100, _payload(1))
+    samples, missing = decoder.decode(data)
+    assert len(samples) == 16 and not missing.any()
+    assert decoder.packets_lost == 0
+
+
+def pack10(samples):
+    """Pack 10-bit samples 4 to every 5 bytes, the inverse of `unpack10`."""
+    samples = np.asarray(samples, dtype=np.uint16).reshape(-1, 4)
+    low = ((samples & 3) << (2*np.arange(4))).sum(axis=1)
+    return np.column_stack((samples >> 2, low)).astype(np.uint8).tobytes()
+
+
+def test_round_trip():
+    samples = np.random.default_rng(0).integers(0, 1024, 400).astype(np.uint16)
+    samples[:4] = [0, 1023, 512, 3]
+    np.testing.assert_array_equal(unpack10(pack10(samples)), samples)
+
+
+def test_unpack_into_slot():
+    samples = np.arange(0, 1024, 16, dtype=np.uint16)
+    out = np.zeros(len(samples) + 4, dtype=np.uint16)
+    unpack10(pack10(samples), out=out[:len(samples)])
+    np.testing.assert_array_equal(out[:len(samples)], samples)
+    assert not out[len(samples):].any()
+
+
+def test_packed_decoder_fills_with_mid_scale(make_packet):
+    decoder = PacketDecoder(payload_size=8, fill_value=512, packed=True)
+    payloads = [np.arange(8)*100 + seq for seq in range(3)]
+    data = make_packet(0, np.frombuffer(pack10(payloads[0]), np.uint8)) \
+        + make_packet(2, np.frombuffer(pack10(payloads[2]), np.uint8))
+    packed, missing = decoder.decode(data)
+    assert len(packed) == 3*10 and len(missing) == 3*8
+    np.testing.assert_array_equal(unpack10(packed), np.concatenate((payloads[0], np.full(8, 512), payloads[2])))
+    np.testing.assert_array_equal(missing, np.repeat([False, True, False], 8))
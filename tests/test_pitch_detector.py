@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from PitchDetector import HarmonicDetector
+from SpectrumAnalyzer import SpectrumAnalyzer
+
+
+def _tone(frequency, rate, n, amplitudes=(1.0, 0.5, 0.3)):
+    t = np.arange(n)/rate
+    return 128 + sum(40*a*np.sin(2*np.pi*h*frequency*t) for h, a in enumerate(amplitudes, 1))
+
+
+@pytest.mark.parametrize("method", ["product", "sum"])
+@pytest.mark.parametrize("rate, f_max, window_size, frequency", [
+    (20000, 1000, 8192, 82.4),
+    (20000, 1000, 8192, 246.9),
+    # Above f_max/3, where only some harmonics are in the band
+    (20000, 1000, 8192, 440.0),
+    (20000, 1000, 8192, 659.3),
+    (20000, 1000, 8192, 880.0),
+    (1250, 500, 512, 196.0),
+    (1250, 500, 512, 246.9),
+    (1250, 500, 512, 329.6),
+])
+def test_fundamental_not_subharmonic(method, rate, f_max, window_size, frequency):
+    detector = HarmonicDetector(SpectrumAnalyzer(rate, 30, f_max), -15, window_size, method)
+    f0, confidence = detector.detect(_tone(frequency, rate, window_size))
+    assert f0 == pytest.approx(frequency, rel=0.002) and confidence > 0.5
+
+
+@pytest.mark.parametrize("method", ["product", "sum"])
+def test_missing_fundamental(method):
+    detector = HarmonicDetector(SpectrumAnalyzer(20000), -15, 8192, method)
+    f0, _ = detector.detect(_tone(110.0, 20000, 8192, (0.1, 1.0, 0.8)))
+    assert f0 == pytest.approx(110.0, rel=0.002)
@@ -0,0 +1,55 @@
+import pytest
+from PitchTracker import PitchTracker
+from Tunings import standard_tuning, tunings
+
+
+def _settle(tracker, frequency, n=10):
+    for _ in range(n):
+        tracker.update(frequency, 1.0)
+    return tracker.displayed
+
+
+def test_in_tune_with_hysteresis():
+    tracker = PitchTracker(standard_tuning, in_tune=1.0, hysteresis=0.5)
+    assert _settle(tracker, 110.5)["state"] == "in tune"
+    # Within in_tune + hysteresis it stays in tune
+    assert _settle(tracker, 111.3, 30)["state"] == "in tune"
+    assert _settle(tracker, 111.8, 30)["state"] == "sharp"
+    # Coming back it needs to be within in_tune again
+    assert _settle(tracker, 111.3, 30)["state"] == "sharp"
+    assert _settle(tracker, 110.5, 30)["state"] == "in tune"
+    assert _settle(tracker, 108.0, 30)["state"] == "flat"
+
+
+def test_rejects_single_octave_error():
+    tracker = PitchTracker(standard_tuning)
+    _settle(tracker, 110.0)
+    tracker.update(220.0, 1.0)
+    assert tracker.displayed["note"] == "A2"
+
+
+def test_only_changes_are_reported():
+    tracker = PitchTracker(standard_tuning)
+    _settle(tracker, 110.0)
+    assert tracker.update(110.0, 1.0) == {}
+
+
+def test_release_clears_after_unconfident_estimates():
+    tracker = PitchTracker(standard_tuning, release=3)
+    _settle(tracker, 110.0)
+    assert tracker.update(0.0, 0.0) == {}
+    assert tracker.update(0.0, 0.0) == {}
+    changes = tracker.update(0.0, 0.0)
+    assert changes["note"] is None and changes["state"] is None
+
+
+@pytest.mark.parametrize("tuning", [tunings[1], standard_tuning])
+def test_set_tuning_clears_display(tuning):
+    tracker = PitchTracker(standard_tuning)
+    shown = _settle(tracker, 110.0)
+    changes = tracker.set_tuning(tuning)
+    assert changes == {key: None for key in shown}
+    assert all(value is None for value in tracker.displayed.values())
+    # Nothing left over to clear on the following silent estimates
+    assert tracker.update(0.0, 0.0) == {}
+    assert tracker.reset() == {}
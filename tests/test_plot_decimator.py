@@ -0,0 +1,60 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from PlotDecimator import PlotDecimator
+
+
+@pytest.fixture
+def ax():
+    fig = plt.figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_subplot(1, 1, 1)
+    yield ax
+    plt.close(fig)
+
+
+def _columns(ax, x):
+    return np.floor(ax.transData.transform(np.column_stack((x, np.zeros(len(x)))))[:, 0] - ax.bbox.x0)
+
+
+def test_minmax_keeps_every_peak(ax):
+    x = np.linspace(0, 1, 20001)
+    line, = ax.plot(x, np.zeros(len(x)))
+    ax.set_xlim(0, 1)
+    y = np.random.default_rng(0).standard_normal(len(x))
+    y[12345] = 100
+    PlotDecimator(line, x).update(y)
+    shown = line.get_ydata()
+    assert len(shown) <= 2*ax.bbox.width + 4
+    assert shown.max() == 100 and shown.min() == y.min()
+
+
+def test_max_on_log_axis(ax):
+    x = np.linspace(0, 2000, 8193)
+    line, = ax.plot(x, np.zeros(len(x)))
+    ax.set_xscale("log")
+    ax.set_xlim(30, 1000)
+    y = -60 + np.random.default_rng(1).random(len(x))
+    y[np.searchsorted(x, 110)] = -3
+    PlotDecimator(line, x, mode="max").update(y)
+    shown_x, shown_y = line.get_xdata(), line.get_ydata()
+    # One point per column, at most
+    assert len(np.unique(_columns(ax, shown_x))) == len(shown_x) < 1000
+    assert shown_y.max() == -3
+    assert abs(shown_x[np.argmax(shown_y)] - 110) < 2
+
+
+def test_short_trace_is_only_cropped(ax):
+    x = np.arange(10.0)
+    line, = ax.plot(x, np.zeros(10))
+    ax.set_xlim(2, 6)
+    PlotDecimator(line, x, mode="max").update(x*2)
+    np.testing.assert_array_equal(line.get_xdata(), np.arange(1, 8))
+    np.testing.assert_array_equal(line.get_ydata(), 2*np.arange(1, 8))
+
+
+def test_unknown_mode(ax):
+    line, = ax.plot([0, 1], [0, 1])
+    with pytest.raises(ValueError):
+        PlotDecimator(line, [0, 1], mode="power")
@@ -0,0 +1,97 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+import RasterCanvas
+
+
+class _Widget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def create_image(self, *args, **kwargs):
+        return 1
+
+    def bind(self, *args):
+        pass
+
+    def itemconfig(self, *args, **kwargs):
+        pass
+
+
+class _Photo:
+    created = 0
+
+    def __init__(self, mode, size):
+        _Photo.created += 1
+        self.image = None
+
+    def paste(self, image):
+        self.image = np.array(image)
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    """A spectrum axes with a trace and a tuning marker, drawn without Tk."""
+    monkeypatch.setattr(RasterCanvas.tk, "Canvas", _Widget)
+    monkeypatch.setattr(RasterCanvas.ImageTk, "PhotoImage", _Photo)
+    fig = plt.figure()
+    fig.patch.set_facecolor("black")
+    ax = fig.add_subplot(1, 1, 1)
+    ax.set_xscale("log")
+    ax.set_xlim(30, 1000)
+    ax.set_ylim(-60, 0)
+    f = np.linspace(0, 2000, 4097)
+    line, = ax.plot(f, np.zeros(len(f)), color="#7951FF")
+    marker = ax.axvline(110, ymin=0.06, ymax=0.93, color="white", linewidth=1)
+    canvas = RasterCanvas.RasterCanvas(None, fig, [line], [marker])
+    canvas.resize(640, 480)
+    trace = canvas.trace(line, f)
+    yield canvas, trace, marker, f
+    plt.close(fig)
+
+
+def _column(canvas, marker, f):
+    pane = canvas._panes[marker.axes]
+    column, _ = canvas._position(marker, pane, f, 0.5)
+    return canvas._photo.image[pane.y0:pane.y1, column, :3]
+
+
+def test_marker_moved_with_one_x_is_still_drawn(scene):
+    canvas, trace, marker, f = scene
+    trace.update(np.full(len(f), -100.0))
+    canvas.update()
+    assert (_column(canvas, marker, 110) == 255).all(axis=1).any()
+
+    marker.set_xdata([196])
+    canvas.update()
+    assert (_column(canvas, marker, 196) == 255).all(axis=1).any()
+    assert not (_column(canvas, marker, 110) == 255).all(axis=1).any()
+
+
+def test_silent_and_float32_spectra(scene):
+    canvas, trace, marker, f = scene
+    with np.errstate(divide="ignore"):
+        silent = 10*np.log10(np.zeros(len(f)))
+    with np.errstate(all="raise"):
+        trace.update(silent)
+        canvas.update()
+        trace.update(np.full(len(f), -30, dtype=np.float32))
+        canvas.update()
+    # The float32 trace is a flat line across the middle of the axes
+    pane = canvas._panes[marker.axes]
+    rows = np.flatnonzero((_column(canvas, marker, 500) == (0x79, 0x51, 0xFF)).all(axis=1))
+    assert len(rows) and abs(rows.mean() - (pane.y1 - pane.y0)/2) < 2
+
+
+def test_static_change_only_redraws_layer(scene):
+    canvas, trace, marker, f = scene
+    canvas.update()
+    buffer, created = canvas._buffer, _Photo.created
+    marker.set_xdata([82.4])
+    canvas.update()
+    assert canvas._buffer is buffer and _Photo.created == created
+    canvas.resize(800, 600)
+    canvas.update()
+    assert canvas._buffer is not buffer and _Photo.created == created + 1
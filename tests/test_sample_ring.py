@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from SampleRing import SampleRing
+
+
+def _filled(capacity, count, chunk):
+    ring = SampleRing(capacity, dtype=np.int64)
+    data = np.arange(count)
+    for start in range(0, count, chunk):
+        ring.extend(data[start:start + chunk])
+    return ring, data
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 10, 25])
+def test_latest_across_wrap(chunk):
+    ring, data = _filled(10, 57, chunk)
+    assert ring.index == 57 and len(ring) == 10
+    for n in range(11):
+        np.testing.assert_array_equal(ring.latest(n), data[57 - n:57])
+    # Views are contiguous slices of the backing array, not copies
+    assert ring.latest(10).base is ring._buf
+
+
+def test_mirrored_halves_agree():
+    ring, _ = _filled(10, 57, 3)
+    np.testing.assert_array_equal(ring._buf[:10], ring._buf[10:])
+
+
+def test_latest_at_earlier_index():
+    ring, data = _filled(10, 57, 4)
+    np.testing.assert_array_equal(ring.latest(4, 55), data[51:55])
+    # Only the samples written so far
+    ring = SampleRing(10)
+    ring.extend([1, 2, 3])
+    np.testing.assert_array_equal(ring.latest(8), [1, 2, 3])
+
+
+def test_since_clips_to_what_is_held():
+    ring, data = _filled(10, 57, 5)
+    samples, start = ring.since(50)
+    assert start == 50
+    np.testing.assert_array_equal(samples, data[50:])
+    samples, start = ring.since(20)
+    assert start == 47
+    np.testing.assert_array_equal(samples, data[47:])
+
+
+def test_views_are_read_only():
+    ring, _ = _filled(10, 15, 5)
+    with pytest.raises(ValueError):
+        ring.latest(3)[0] = 0
+
+
+def test_extend_from_across_wrap():
+    ring = SampleRing(10, dtype=np.int64)
+    ring.extend(np.arange(8))
+    block = np.arange(100, 106)
+
+    def fill(slot, offset):
+        slot[:] = block[offset:offset + len(slot)]
+
+    ring.extend_from(len(block), fill)
+    np.testing.assert_array_equal(ring.latest(), [4, 5, 6, 7, 100, 101, 102, 103, 104, 105])
@@ -0,0 +1,61 @@
+import time
+import numpy as np
+from PacketDecoder import PacketDecoder
+from SampleRing import SampleRing
+from SerialReader import SerialReader
+
+
+class _Port:
+    """Serial port stand-in which hands out a fixed byte string."""
+
+    def __init__(self, data):
+        self.data = data
+        self.timeout = None
+
+    @property
+    def in_waiting(self):
+        return len(self.data)
+
+    def read(self, n):
+        chunk, self.data = self.data[:n], self.data[n:]
+        if not chunk:
+            time.sleep(0.001)
+        return chunk
+
+    def readinto(self, buffer):
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self):
+        pass
+
+
+def _read_all(data, decoder, samples):
+    ring = SampleRing(1024)
+    reader = SerialReader(_Port(data), ring, decoder=decoder)
+    reader.start()
+    deadline = time.time() + 5
+    while ring.index < samples and time.time() < deadline:
+        time.sleep(0.001)
+    reader.stop()
+    return reader, ring
+
+
+def test_filled_samples_are_marked(make_packet):
+    decoder = PacketDecoder(payload_size=8)
+    data = b"".join(make_packet(seq, np.full(8, 100 + seq)) for seq in (0, 1, 3, 4))
+    reader, ring = _read_all(data, decoder, 40)
+
+    assert ring.index == 40
+    np.testing.assert_array_equal(ring.latest(), np.repeat([100, 101, 128, 103, 104], 8))
+    assert reader.filled(40, 40) == 8
+    assert reader.filled(16, 40) == 0
+    assert reader.filled(24, 40) == 8
+    assert reader.filled(16, 16) == 0
+
+
+def test_raw_samples_have_no_gaps():
+    reader, ring = _read_all(bytes(range(32)), None, 32)
+    assert reader.gaps is None
+    assert reader.filled(32, ring.index) == 0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from StrumTuner import StrumTuner
+from Tunings import standard_tuning, tunings
+
+RATE = 20000
+
+
+def _strum(tuning, cents, n, rate=RATE, harmonics=3):
+    t = np.arange(n)/rate
+    x = np.full(n, 128.0)
+    for f, c in zip(tuning.values(), cents):
+        for h in range(1, harmonics + 1):
+            x += 30/h*np.sin(2*np.pi*h*f*2**(c/1200)*t)
+    return x
+
+
+@pytest.mark.parametrize("decimation", [1, 3])
+def test_measures_every_string(decimation):
+    cents = [-20, -10, 0, 5, 12, 30]
+    rate, window_size = RATE/decimation, 8192//decimation
+    tuner = StrumTuner(rate, standard_tuning, window_size)
+    measured, _, sounding = tuner.measure(_strum(standard_tuning, cents, window_size, rate))
+    assert sounding.all()
+    np.testing.assert_allclose(measured, cents, atol=0.5)
+
+
+def test_kernel_matches_direct_dft():
+    tuner = StrumTuner(RATE, standard_tuning, 1000)
+    tuner._build_kernel()
+    n = np.arange(1000)
+    direct = np.exp(-2j*np.pi*np.outer(tuner._frequencies, n)/RATE) * np.hanning(1000)/tuner.full_scale
+    np.testing.assert_allclose(tuner._kernel[:, :1000], direct, atol=1e-6)
+    assert not tuner._kernel[:, 1000:].any()
+
+
+def test_kernel_built_on_first_measurement():
+    tuner = StrumTuner(RATE, standard_tuning)
+    tuner.set_tuning(tunings[1])
+    assert tuner._kernel is None
+    tuner.measure(_strum(tunings[1], [0]*6, tuner.window_size))
+    assert tuner._kernel is not None
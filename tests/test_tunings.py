@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from Tunings import NoteIndex, closest_note, note_index, tunings
+
+
+def _reference(peak_frequency, tuning):
+    """The linear search `closest_note` used before `NoteIndex`."""
+    note, note_freq = min(tuning.items(), key=lambda x: abs(peak_frequency - x[1]))
+    error = round(peak_frequency - note_freq, 1)
+    error_c = round(1200 * np.log2(peak_frequency/note_freq), 1)
+    return note, note_freq, error, error_c
+
+
+FREQUENCIES = np.concatenate((np.random.default_rng(0).uniform(20, 1500, 500),
+                              [82.4, 110.0, 329.6, 61.7, 1318.5, 5000.0, 1.0]))
+
+
+@pytest.mark.parametrize("tuning", tunings, ids=range(len(tunings)))
+def test_matches_linear_search(tuning):
+    for frequency in FREQUENCIES:
+        assert closest_note(frequency, tuning) == _reference(frequency, tuning)
+
+
+@pytest.mark.parametrize("tuning", tunings, ids=range(len(tunings)))
+def test_lookup_matches_closest(tuning):
+    index = NoteIndex(tuning)
+    notes, note_frequencies, error, error_c = index.lookup(FREQUENCIES)
+    for k, frequency in enumerate(FREQUENCIES):
+        note, note_freq, e, e_c = index.closest(frequency)
+        assert (notes[k], note_frequencies[k]) == (note, note_freq)
+        assert error[k] == pytest.approx(e) and error_c[k] == pytest.approx(e_c)
+
+
+def test_unsorted_tuning_and_silence():
+    tuning = {"B3": 246.9, "E2": 82.4, "G3": 196.0}
+    index = note_index(tuning)
+    assert index is note_index(dict(tuning)) and note_index(index) is index
+    assert list(index.names) == ["E2", "G3", "B3"]
+    assert index.closest(0.0)[3] == 0.0
+    assert index.lookup([0.0, -1.0])[3].tolist() == [0.0, 0.0]
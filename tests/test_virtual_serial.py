@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from Capture import CaptureWriter
+from VirtualSerial import CaptureSource, open_source
+
+
+def _record(path, samples, dtype, sampling_rate):
+    writer = CaptureWriter(path, dtype, sampling_rate)
+    writer.write(samples)
+    writer.close()
+
+
+def test_capture_rate_from_metadata(tmp_path):
+    path = str(tmp_path/"capture")
+    _record(path, np.arange(100), np.uint8, 5000)
+    source = open_source(path + ".raw", 20000, loop=False)
+    assert isinstance(source, CaptureSource) and source.sampling_rate == 5000
+    np.testing.assert_array_equal(source.read(200), np.arange(100))
+
+
+def test_rejects_packed_capture(tmp_path):
+    path = str(tmp_path/"capture")
+    _record(path, np.arange(100)*10, np.uint16, 20000)
+    with pytest.raises(ValueError, match="16-bit"):
+        CaptureSource(path + ".raw")
+
+
+def test_plain_raw_file(tmp_path):
+    path = str(tmp_path/"plain.raw")
+    np.arange(10, dtype=np.uint8).tofile(path)
+    source = CaptureSource(path, 8000)
+    assert source.sampling_rate == 8000
+    np.testing.assert_array_equal(source.read(12), [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 0, 1])